@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+from collections import defaultdict, deque
+
+# ----- Configuration -----
+CHECKPOINT_FILE  = "batch_checkpoint.json"
+CHECKPOINT_EVERY = 5.0   # seconds between checkpoint writes
+REPORT_EVERY     = 30.0  # seconds between throughput / ETA lines
+FEED_SUFFIXES    = (".xml", ".rss", ".atom")
+
+
+# ----- Sources: every one is a generator, so memory stays flat however long the input -----
+def iter_lines(f):
+    for line in f:
+        url = line.strip()
+        if url and not url.startswith("#"):
+            yield url
+
+
+def iter_url_file(path):
+    with open(path, encoding="utf-8") as f:
+        yield from iter_lines(f)
+
+
+def iter_stdin():
+    yield from iter_lines(sys.stdin)
+
+
+def entry_link(entry):
+    # RSS <link>text</link>, Atom <link rel="alternate" href="..."/>, else a permalink <guid>
+    from lxml import etree
+
+    fallback = None
+    for child in entry:
+        if not isinstance(child.tag, str):
+            continue
+        name = etree.QName(child).localname
+        if name == "link":
+            href = child.get("href")
+            if href is None and child.text and child.text.strip():
+                return child.text.strip()
+            if href and child.get("rel", "alternate") == "alternate":
+                return href.strip()
+        elif name in ("guid", "id") and child.text and child.get("isPermaLink", "true") == "true":
+            if child.text.strip().startswith("http"):
+                fallback = child.text.strip()
+    return fallback
+
+
+def iter_feed(path):
+    from lxml import etree
+
+    # Streams <item> (RSS) and <entry> (Atom) and frees each one once its link is read
+    for _, elem in etree.iterparse(path, events=("end",), tag=("{*}item", "{*}entry"),
+                                   recover=True, huge_tree=True):
+        url = entry_link(elem)
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+        if url:
+            yield url
+
+
+def is_feed(path):
+    if path.lower().endswith(FEED_SUFFIXES):
+        return True
+    with open(path, "rb") as f:
+        return f.read(256).lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<")
+
+
+def iter_source(source):
+    if source == "-":
+        return iter_stdin()
+    return iter_feed(source) if is_feed(source) else iter_url_file(source)
+
+
+def count_urls(sources):
+    # Only plain URL files can be counted up front; stdin and feeds give no ETA
+    if any(source == "-" or is_feed(source) for source in sources):
+        return None
+    return sum(sum(1 for _ in iter_url_file(source)) for source in sources)
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}h{rest // 60:02d}m" if hours else f"{rest // 60}m{rest % 60:02d}s"
+
+
+class BatchProgress:
+    # Positions are ordinals across all sources. The checkpoint is the lowest position
+    # still in flight, so a resumed batch never skips an article that was queued but not
+    # rendered; anything redone past it is caught by the ledger.
+    def __init__(self, sources, path=CHECKPOINT_FILE):
+        self.sources = list(sources)
+        self.key = [source if source == "-" else os.path.abspath(source) for source in self.sources]
+        self.path = path
+        self.lock = threading.Lock()
+        self.in_flight = {}                  # position -> url
+        self.by_url = defaultdict(deque)     # url -> positions, for duplicate lines
+        self.start = self.load()
+        self.next_position = self.start
+        self.total = count_urls(self.sources)
+        self.rendered = 0
+        self.skipped = 0
+        self.started_at = time.monotonic()
+        self.last_saved = self.last_report = self.started_at
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if state.get("sources") != self.key:
+            logging.info(f"[BATCH] Checkpoint {self.path} is for other inputs, starting from the top")
+            return 0
+        logging.info(f"[BATCH] Resuming at #{state['position']} from {self.path}")
+        return state["position"]
+
+    def entries(self):
+        # Yields (position, url) from the checkpoint onwards
+        position = 0
+        for source in self.sources:
+            for url in iter_source(source):
+                if position >= self.start:
+                    yield position, url
+                position += 1
+
+    def checkpoint(self):
+        return min(self.in_flight) if self.in_flight else self.next_position
+
+    def submit(self, position, url):
+        with self.lock:
+            self.in_flight[position] = url
+            self.by_url[url].append(position)
+            self.next_position = position + 1
+
+    def skip(self, position):
+        with self.lock:
+            self.skipped += 1
+            self.next_position = position + 1
+        self.tick()
+
+    def finish(self, url):
+        with self.lock:
+            positions = self.by_url.get(url)
+            if not positions:
+                return
+            self.in_flight.pop(positions.popleft(), None)
+            if not positions:
+                del self.by_url[url]
+            self.rendered += 1
+        self.tick()
+
+    def tick(self):
+        now = time.monotonic()
+        if now - self.last_saved >= CHECKPOINT_EVERY:
+            self.save()
+        if now - self.last_report >= REPORT_EVERY:
+            self.report()
+
+    def save(self):
+        with self.lock:
+            state = {"sources": self.key, "position": self.checkpoint(), "saved_at": time.time()}
+            self.last_saved = time.monotonic()
+        out_dir = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".scribe-", suffix=".part", dir=out_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def report(self):
+        with self.lock:
+            position = self.checkpoint()
+            elapsed = max(time.monotonic() - self.started_at, 1e-6)
+            self.last_report = time.monotonic()
+            rendered, skipped = self.rendered, self.skipped
+        per_min = rendered / elapsed * 60
+        line = f"[BATCH] #{position}" + (f"/{self.total}" if self.total is not None else "")
+        line += f": {rendered} rendered ({per_min:.1f}/min), {skipped} already downloaded"
+        advanced = position - self.start
+        if self.total is not None and advanced > 0:
+            line += f", ETA {format_duration((self.total - position) * elapsed / advanced)}"
+        logging.info(line)
+
+    def close(self, completed):
+        self.report()
+        if completed and not self.in_flight:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            logging.info("[BATCH] Finished; checkpoint cleared")
+        else:
+            self.save()
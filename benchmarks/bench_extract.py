@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extract import EXTRACT_FIELDS_JS  # noqa: E402
+from fixture_server import FixtureServer  # noqa: E402
+
+METADATA = {
+    "section": ['[data-flatplan-rubric="true"]', None],
+    "title":   ['[data-flatplan-title="true"]', None],
+    "author":  ['[data-flatplan-author-link="true"]', None],
+    "iso":     ['time[data-flatplan-timestamp="true"]', "datetime"],
+}
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def parse_fields(driver):
+    # The old path: ship the whole page_source over the wire, parse it, then select each field
+    soup = BeautifulSoup(driver.page_source, "html.parser")
+    out = {}
+    for name, (sel, attr) in METADATA.items():
+        el = soup.select_one(sel)
+        out[name] = None if el is None else el.get(attr) if attr else el.get_text().strip()
+    return out
+
+
+def bench(url, repeat):
+    # Both methods extract the same fields from the same loaded page
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    opts = Options()
+    opts.add_argument("--headless=new")
+    driver = webdriver.Chrome(options=opts)
+    try:
+        driver.get(url)
+        t_before, parsed = timed(lambda: parse_fields(driver), repeat)
+        t_after, reply = timed(lambda: driver.execute_script(EXTRACT_FIELDS_JS, METADATA), repeat)
+        if parsed != reply:
+            print(f"Warning: the methods disagree:\n  parsed {parsed}\n  script {reply}")
+        return [
+            ("page_source + html.parser", len(driver.page_source.encode()), t_before),
+            ("single script call", len(json.dumps(reply).encode()), t_after),
+        ]
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metadata extraction in headless Chrome: full-page parse vs "
+                                                 "single script call.")
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--noise-nodes", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", help="measure against this page instead of a local Atlantic-like fixture")
+    args = parser.parse_args()
+
+    if args.url:
+        rows = bench(args.url, args.repeat)
+    else:
+        with FixtureServer() as server:
+            rows = bench(server.article_url(0, kind="atlantic", paragraphs=args.paragraphs,
+                                            nodes=args.noise_nodes, images=0, popups=0), args.repeat)
+
+    print(f"{'method':<28}{'bytes':>12}{'ms':>10}")
+    for name, size, seconds in rows:
+        print(f"{name:<28}{size:>12,}{seconds * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
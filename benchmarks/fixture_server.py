@@ -0,0 +1,161 @@
+import time
+import struct
+import random
+import argparse
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# Synthetic articles with a controllable shape, served locally so benchmarks need no network:
+#   /latest/?count=N&<article params>     Atlantic-like listing linking to N articles
+#   /article/<id>?kind=atlantic|generic   one article, shaped by:
+#       paragraphs  body paragraphs             nodes   clutter nodes around the article
+#       images      number of images            kb      size of each image
+#       lazy        1: loading="lazy" images    popups  1: cookie banner, modal and sticky bar
+#       delay       ms each image is held back
+#   /img/<n>.bmp?kb=K&delay=MS                  an uncompressed image of about K KiB
+DEFAULTS = {"kind": "atlantic", "paragraphs": 60, "nodes": 2000, "images": 6, "kb": 200,
+            "lazy": 1, "popups": 1, "delay": 0}
+WORDS = "the of and a to in is you that it he was for on are as with his they at be this".split()
+
+POPUPS = """
+    <style>.StickyBar { position: sticky; top: 0; background: #eee; }
+           .modal-overlay { position: fixed; inset: 0; background: rgba(0,0,0,.6); }</style>
+    <div class="StickyBar">Subscribe for unlimited access</div>
+    <div class="modal-overlay"><div class="modal">Sign up for our newsletter <button>Close</button></div></div>
+    <div id="cookie-banner" style="position: fixed; bottom: 0">We use cookies <button>Accept</button></div>
+"""
+
+
+def params_of(query):
+    values = dict(DEFAULTS)
+    for key, items in parse_qs(query).items():
+        if key in values:
+            values[key] = items[0] if key == "kind" else int(items[0])
+    return values
+
+
+@lru_cache(maxsize=64)
+def bmp_image(kb):
+    # 24-bit BMP, 256 px wide; rows are 768 bytes so no padding is needed
+    width = 256
+    height = max(1, kb * 1024 // (width * 3))
+    pixels = bytes((x * 7 + y * 3) % 256 for y in range(height) for x in range(width * 3))
+    header = struct.pack("<2sIHHI", b"BM", 54 + len(pixels), 0, 0, 54)
+    info = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 24, 0, len(pixels), 2835, 2835, 0, 0)
+    return header + info + pixels
+
+
+def article_html(article_id, p):
+    rnd = random.Random(article_id)
+    title = " ".join(rnd.choices(WORDS, k=8)).capitalize()
+    clutter = "".join(
+        f'<div class="Promo_{i}"><a href="/x/{i}"><span>{" ".join(rnd.choices(WORDS, k=5))}</span></a></div>'
+        for i in range(p["nodes"]))
+    lazy = ' loading="lazy"' if p["lazy"] else ""
+    figures = [
+        f'<figure><img src="/img/{article_id}-{i}.bmp?kb={p["kb"]}&delay={p["delay"]}"{lazy} alt="">'
+        f'<figcaption>Figure {i}</figcaption></figure>'
+        for i in range(p["images"])]
+    paragraphs = [f"<p>{' '.join(rnd.choices(WORDS, k=80))}</p>" for _ in range(p["paragraphs"])]
+    step = max(1, len(paragraphs) // (len(figures) + 1))
+    for i, figure in enumerate(figures):
+        paragraphs.insert((i + 1) * step + i, figure)
+    body = "".join(paragraphs)
+
+    if p["kind"] == "atlantic":
+        # Same markup main.py's Atlantic profile reads
+        header = f"""<header class="ArticleHeader">
+            <a data-flatplan-rubric="true">Politics</a>
+            <h1 data-flatplan-title="true">{title}</h1>
+            <a data-flatplan-author-link="true">Jane Writer</a>
+            <time data-flatplan-timestamp="true" datetime="2025-05-01T12:00:00Z">May 1</time></header>"""
+        meta = ""
+    else:
+        header = f"<h1>{title}</h1>"
+        meta = f"""<meta property="og:title" content="{title}">
+            <meta property="article:section" content="Politics"><meta name="author" content="Jane Writer">
+            <meta property="article:published_time" content="2025-05-01T12:00:00Z">"""
+    return f"""<!DOCTYPE html><html><head><title>{title}</title>{meta}</head><body>
+        <nav>{clutter[:len(clutter) // 2]}</nav>{POPUPS if p["popups"] else ""}
+        <main><article>{header}{body}</article></main>
+        <aside class="sidebar">{clutter[len(clutter) // 2:]}</aside><footer>Footer</footer></body></html>"""
+
+
+def listing_html(base, count, query):
+    links = "".join(
+        f'<li><a class="LandingRiver_titleLink__nUImQ" href="{base}/article/{i}?{query}">Article {i}</a></li>'
+        for i in range(count))
+    return f"<!DOCTYPE html><html><head><title>Latest</title></head><body><ul>{links}</ul></body></html>"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        p = params_of(parts.query)
+        if parts.path.startswith("/img/"):
+            if p["delay"]:
+                time.sleep(p["delay"] / 1000)
+            self.send_body(bmp_image(p["kb"]), "image/bmp")
+        elif parts.path.startswith("/article/"):
+            article_id = parts.path.rsplit("/", 1)[-1] or "0"
+            self.send_body(article_html(article_id, p).encode("utf-8"), "text/html; charset=utf-8")
+        elif parts.path.rstrip("/") == "/latest":
+            count = int(parse_qs(parts.query).get("count", ["10"])[0])
+            base = f"http://{self.headers.get('Host')}"
+            self.send_body(listing_html(base, count, urlencode(p)).encode("utf-8"), "text/html; charset=utf-8")
+        else:
+            self.send_error(404)
+
+
+class FixtureServer:
+    # Runs the fixture site on a background thread; port 0 picks a free port
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fixture-server", daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def article_url(self, article_id, **params):
+        return f"{self.base_url}/article/{article_id}?{urlencode({**DEFAULTS, **params})}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic article pages for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    args = parser.parse_args()
+    with FixtureServer(args.host, args.port) as server:
+        print(f"Serving fixtures on {server.base_url} (try {server.base_url}/latest/?count=5)")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fixture_server import DEFAULTS, FixtureServer  # noqa: E402
+
+STAGES = ("startup", "navigate", "prepare", "metadata", "cleanup", "print", "write")
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+THRESHOLD = 0.15  # a stage p50 this much slower than the baseline is a regression
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {stage: {"n": len(values),
+                    "mean_ms": round(statistics.fmean(values), 1),
+                    "p50_ms": round(percentile(values, 50), 1),
+                    "p95_ms": round(percentile(values, 95), 1),
+                    "max_ms": round(max(values), 1)}
+            for stage, values in samples.items() if values}
+
+
+def timed_send(send, timings):
+    # Wraps a CDP sender so Page.printToPDF is timed apart from the IO.read / decode / write loop
+    def wrapped(method, params):
+        started = time.perf_counter()
+        try:
+            return send(method, params)
+        finally:
+            if method == "Page.printToPDF":
+                timings["print"] = (time.perf_counter() - started) * 1000
+    return wrapped
+
+
+def run(args, server, out_dir):
+    import main
+    from cleanup import run_cleanup
+    from pacing import wait_for_ready
+    from pdf_capture import PDF_PRINT_OPTIONS, stream_pdf
+    from procmem import driver_rss, peak_rss_self
+    from site_profiles import get_profile
+
+    site = get_profile(args.fixture)
+    samples = {stage: [] for stage in STAGES}
+    peak_browser = 0
+    pdf_bytes = 0
+    profile_dir = tempfile.mkdtemp(prefix="scribe-bench-profile-")
+
+    started = time.perf_counter()
+    driver = main.create_driver(profile_dir)
+    samples["startup"].append((time.perf_counter() - started) * 1000)
+    try:
+        run_started = time.perf_counter()
+        for i in range(args.articles):
+            url = server.article_url(i, kind=args.fixture, paragraphs=args.paragraphs, nodes=args.nodes,
+                                     images=args.images, kb=args.image_kb, lazy=int(args.lazy),
+                                     popups=int(args.popups), delay=args.image_delay)
+            laps = {}
+            mark = time.perf_counter()
+
+            def lap(stage):
+                nonlocal mark
+                now = time.perf_counter()
+                laps[stage] = (now - mark) * 1000
+                mark = now
+
+            driver.get(url)
+            wait_for_ready(driver)
+            lap("navigate")
+            main.prepare_page(driver, site)
+            lap("prepare")
+            fields = main.extract_article_metadata(driver, site)
+            lap("metadata")
+            if "Unknown" in fields[:3]:
+                raise RuntimeError(f"Fixture metadata not found on {url}: {fields}")
+            run_cleanup(driver, args.cleanup, site.remove, site.content_roots(), report=lambda line: None)
+            lap("cleanup")
+            pdf_bytes += stream_pdf(timed_send(driver.execute_cdp_cmd, laps),
+                                    os.path.join(out_dir, f"article-{i}.pdf"), PDF_PRINT_OPTIONS)
+            total_pdf = (time.perf_counter() - mark) * 1000
+            laps["write"] = total_pdf - laps.get("print", 0)
+
+            for stage, ms in laps.items():
+                samples[stage].append(ms)
+            peak_browser = max(peak_browser, driver_rss(driver) or 0)
+        elapsed = time.perf_counter() - run_started
+    finally:
+        driver.quit()
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "config": {"fixture": args.fixture, "articles": args.articles, "paragraphs": args.paragraphs,
+                   "nodes": args.nodes, "images": args.images, "image_kb": args.image_kb,
+                   "lazy": args.lazy, "popups": args.popups, "image_delay": args.image_delay,
+                   "cleanup": args.cleanup},
+        "stages": summarize(samples),
+        "articles_per_min": round(args.articles / elapsed * 60, 2),
+        "pdf_bytes_total": pdf_bytes,
+        "peak_browser_rss_mb": round(peak_browser / 2**20, 1),
+        "peak_python_rss_mb": round((peak_rss_self() or 0) / 2**20, 1),
+    }
+
+
+def compare(result, baseline, threshold=THRESHOLD):
+    # Returns a list of human-readable regressions (empty when everything is within threshold)
+    regressions = []
+    if baseline.get("config") != result["config"]:
+        print("[WARN] Baseline was recorded with a different configuration; comparing anyway")
+    for stage, stats in result["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or not before["p50_ms"]:
+            continue
+        change = stats["p50_ms"] / before["p50_ms"] - 1
+        if change > threshold:
+            regressions.append(f"{stage}: p50 {before['p50_ms']:.1f} -> {stats['p50_ms']:.1f} ms (+{change:.0%})")
+    before_rate = baseline.get("articles_per_min")
+    if before_rate and result["articles_per_min"] < before_rate * (1 - threshold):
+        regressions.append(f"throughput: {before_rate:.1f} -> {result['articles_per_min']:.1f} articles/min")
+    return regressions
+
+
+def print_report(result):
+    print(f"{'stage':<10}{'n':>5}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}  (ms)")
+    for stage in STAGES:
+        stats = result["stages"].get(stage)
+        if stats:
+            print(f"{stage:<10}{stats['n']:>5}{stats['mean_ms']:>10.1f}{stats['p50_ms']:>10.1f}"
+                  f"{stats['p95_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+    print(f"\n{result['articles_per_min']:.1f} articles/min | peak browser RSS {result['peak_browser_rss_mb']} MiB"
+          f" | peak Python RSS {result['peak_python_rss_mb']} MiB | {result['pdf_bytes_total'] / 2**20:.1f} MiB of PDF")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end render benchmark against local fixture pages.")
+    parser.add_argument("--articles", type=int, default=10)
+    parser.add_argument("--fixture", choices=("atlantic", "generic"), default=DEFAULTS["kind"])
+    parser.add_argument("--paragraphs", type=int, default=DEFAULTS["paragraphs"])
+    parser.add_argument("--nodes", type=int, default=DEFAULTS["nodes"], help="clutter nodes around the article")
+    parser.add_argument("--images", type=int, default=DEFAULTS["images"])
+    parser.add_argument("--image-kb", type=int, default=DEFAULTS["kb"])
+    parser.add_argument("--image-delay", type=int, default=DEFAULTS["delay"], help="ms each image is held back")
+    parser.add_argument("--no-lazy", dest="lazy", action="store_false", help="serve eager images")
+    parser.add_argument("--no-popups", dest="popups", action="store_false", help="leave out overlays")
+    parser.add_argument("--cleanup", choices=("none", "gentle", "aggressive"), default="aggressive")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp(prefix="scribe-bench-")
+    try:
+        with FixtureServer() as server:
+            result = run(args, server, out_dir)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
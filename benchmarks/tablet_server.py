@@ -0,0 +1,113 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+import threading
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Stand-in for the reMarkable USB web interface (http://10.11.99.1), so delivery can be
+# exercised without a tablet:
+#   POST /upload   multipart form with a "file" field, stored in the upload directory
+#   GET  /         lists what was received
+# --delay holds every upload back and --fail-rate answers that share of uploads with a 503,
+# which is how the real tablet behaves when it is busy or asleep.
+
+
+def parse_upload(content_type, body):
+    # Returns (filename, bytes) of the "file" part, or None
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body)
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_filename(), part.get_payload(decode=True)
+    return None
+
+
+class TabletHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, code, text):
+        body = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        received = self.server.received
+        self.reply(200, "\n".join(f"{name}\t{size}" for name, size in received) or "No uploads yet")
+
+    def do_POST(self):
+        if self.path != "/upload":
+            return self.reply(404, "Not found")
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        if server.delay:
+            time.sleep(server.delay / 1000)
+        if server.fail_rate and random.random() < server.fail_rate:
+            return self.reply(503, "Busy")
+        upload = parse_upload(self.headers.get("Content-Type", ""), body)
+        if upload is None or not upload[0]:
+            return self.reply(400, "No file")
+        name, data = os.path.basename(upload[0]), upload[1]
+        with open(os.path.join(server.upload_dir, name), "wb") as f:
+            f.write(data)
+        with server.lock:
+            server.received.append((name, len(data)))
+        self.reply(201, "Upload successful")
+
+
+class TabletServer:
+    # Runs on a background thread; port 0 picks a free port
+    def __init__(self, upload_dir=None, host="127.0.0.1", port=0, delay=0, fail_rate=0.0):
+        self.httpd = ThreadingHTTPServer((host, port), TabletHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.upload_dir = upload_dir or tempfile.mkdtemp(prefix="scribe-tablet-")
+        self.httpd.delay = delay
+        self.httpd.fail_rate = fail_rate
+        self.httpd.received = []
+        self.httpd.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="tablet-server", daemon=True)
+
+    @property
+    def upload_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/upload"
+
+    @property
+    def received(self):
+        with self.httpd.lock:
+            return list(self.httpd.received)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a stand-in for the reMarkable USB web interface.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--dir", help="where uploads are stored (default: a temporary directory)")
+    parser.add_argument("--delay", type=int, default=0, help="ms each upload is held back")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of uploads answered with 503")
+    args = parser.parse_args()
+    with TabletServer(args.dir, args.host, args.port, args.delay, args.fail_rate) as server:
+        print(f"Accepting uploads on {server.upload_url}, storing them in {server.httpd.upload_dir}")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import logging
+import threading
+from fnmatch import fnmatchcase
+
+from pacing import domain_of, register_network_observer
+
+# URL patterns in Network.setBlockedURLs syntax ('*' wildcards)
+BLOCK_RULES = {
+    "ads": [
+        "*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*", "*adservice.google.*",
+        "*amazon-adsystem.com*", "*adnxs.com*", "*criteo.com*", "*criteo.net*", "*pubmatic.com*",
+        "*rubiconproject.com*", "*openx.net*", "*casalemedia.com*", "*taboola.com*", "*outbrain.com*",
+        "*moatads.com*", "*adsafeprotected.com*", "*teads.tv*", "*sharethrough.com*", "*prebid*",
+    ],
+    "analytics": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*analytics.google.com*", "*scorecardresearch.com*",
+        "*chartbeat.com*", "*chartbeat.net*", "*cdn.segment.com*", "*api.segment.io*", "*hotjar.com*",
+        "*newrelic.com*", "*nr-data.net*", "*parsely.com*", "*quantserve.com*", "*mixpanel.com*",
+        "*connect.facebook.net*", "*bat.bing.com*", "*sentry.io*", "*permutive.com*", "*krxd.net*",
+    ],
+    "video": [
+        "*youtube.com/embed*", "*youtube-nocookie.com*", "*ytimg.com*", "*player.vimeo.com*",
+        "*jwplayer.com*", "*jwpcdn.com*", "*brightcove*", "*.mp4*", "*.m3u8*", "*.webm*", "*.mpd*",
+    ],
+    "fonts": [
+        "*.woff2*", "*.woff*", "*.ttf*", "*.otf*", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+        "*use.typekit.net*", "*fonts.net*",
+    ],
+}
+BLOCK_CATEGORIES = ("ads", "analytics", "video", "fonts")
+
+# Blocked requests never report a size, so savings are estimated from typical sizes
+TYPICAL_BYTES = {"ads": 45_000, "analytics": 30_000, "video": 750_000, "fonts": 60_000}
+
+
+class RequestBlocker:
+    # site_allow: {domain: [category or URL pattern, ...]} let through on that site only
+    def __init__(self, categories=BLOCK_CATEGORIES, site_allow=None, rules=BLOCK_RULES):
+        self.categories = tuple(categories)
+        self.site_allow = site_allow or {}
+        self.rules = rules
+        self.lock = threading.Lock()
+        self.urls = {}  # requestId -> url, for categorising blocked requests
+        self.page = {}
+        self.totals = {}
+
+    def patterns_for(self, url):
+        domain = domain_of(url)
+        allowed = set()
+        for site, entries in self.site_allow.items():
+            if domain == site or domain.endswith("." + site):
+                allowed.update(entries)
+        patterns = []
+        for category in self.categories:
+            if category in allowed:
+                continue
+            patterns += [p for p in self.rules.get(category, ()) if p not in allowed]
+        return patterns
+
+    def category_of(self, url):
+        for category in self.categories:
+            if any(fnmatchcase(url, p) for p in self.rules.get(category, ())):
+                return category
+        return "other"
+
+    def observe(self, method, params):
+        if method == "Network.requestWillBeSent":
+            with self.lock:
+                if len(self.urls) > 5000:
+                    self.urls.clear()
+                self.urls[params.get("requestId")] = params.get("request", {}).get("url", "")
+        elif method == "Network.loadingFailed" and params.get("blockedReason") == "inspector":
+            with self.lock:
+                url = self.urls.pop(params.get("requestId"), "")
+                category = self.category_of(url)
+                self.page[category] = self.page.get(category, 0) + 1
+                self.totals[category] = self.totals.get(category, 0) + 1
+
+    def apply(self, driver, url):
+        # Chrome via Selenium: the performance log feeds observe() through pacing
+        register_network_observer(driver, self.observe)
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns_for(url)})
+
+    def apply_tab(self, tab, url):
+        # CDP tab sessions deliver the events directly
+        if not getattr(tab, "blocker_attached", False):
+            for method in ("Network.requestWillBeSent", "Network.loadingFailed"):
+                tab.conn.on(method, lambda params, m=method: self.observe(m, params), tab.session_id)
+            tab.send("Network.enable")
+            tab.blocker_attached = True
+        tab.send("Network.setBlockedURLs", {"urls": self.patterns_for(url)})
+
+    @staticmethod
+    def describe(counts):
+        blocked = sum(counts.values())
+        saved = sum(TYPICAL_BYTES.get(c, 0) * n for c, n in counts.items())
+        detail = ", ".join(f"{c}={n}" for c, n in sorted(counts.items()))
+        return f"{blocked} requests blocked (~{saved / 2**20:.1f} MiB saved){': ' + detail if detail else ''}"
+
+    def page_summary(self, url):
+        with self.lock:
+            counts, self.page = self.page, {}
+        logging.info(f"[BLOCK] {url}: {self.describe(counts)}")
+        return counts
+
+
+def log_run_total(blockers):
+    # One blocker per worker/tab keeps per-page counts apart; the run total sums them
+    counts = {}
+    for blocker in blockers:
+        with blocker.lock:
+            for category, n in blocker.totals.items():
+                counts[category] = counts.get(category, 0) + n
+    logging.info(f"[BLOCK] Run total: {RequestBlocker.describe(counts)}")
+    return counts
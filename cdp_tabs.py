@@ -0,0 +1,216 @@
+import json
+import time
+import logging
+import itertools
+import threading
+import urllib.request
+
+from pdf_capture import PDF_PRINT_OPTIONS, stream_pdf
+
+NAVIGATION_TIMEOUT = 30
+COMMAND_TIMEOUT    = 60
+
+
+class CdpError(Exception):
+    pass
+
+
+class CdpConnection:
+    # A raw DevTools websocket to the browser that chromedriver started. Unlike
+    # driver.execute_cdp_cmd it can drive several targets at once and receive events.
+    def __init__(self, ws_url):
+        import websocket  # websocket-client
+
+        self.ws = websocket.create_connection(ws_url, suppress_origin=True, enable_multithread=True)
+        self.ids = itertools.count(1)
+        self.pending = {}    # id -> [threading.Event, message]
+        self.listeners = {}  # (session_id, method) -> [callback]
+        self.lock = threading.Lock()
+        self.closed = False
+        self.reader = threading.Thread(target=self.read_loop, name="cdp-reader", daemon=True)
+        self.reader.start()
+
+    def read_loop(self):
+        while not self.closed:
+            try:
+                message = json.loads(self.ws.recv())
+            except Exception:
+                break
+            if "id" in message:
+                with self.lock:
+                    waiter = self.pending.pop(message["id"], None)
+                if waiter:
+                    waiter[1] = message
+                    waiter[0].set()
+                continue
+            key = (message.get("sessionId"), message.get("method"))
+            with self.lock:
+                callbacks = list(self.listeners.get(key, ()))
+            for callback in callbacks:
+                try:
+                    callback(message.get("params", {}))
+                except Exception as e:
+                    logging.warning(f"[CDP] {key[1]} listener failed: {e}")
+        self.closed = True
+        with self.lock:  # wake everybody still waiting on a reply
+            for waiter in self.pending.values():
+                waiter[0].set()
+            self.pending.clear()
+
+    def send(self, method, params=None, session_id=None, timeout=COMMAND_TIMEOUT):
+        if self.closed:
+            raise CdpError("DevTools connection is closed")
+        msg_id = next(self.ids)
+        waiter = [threading.Event(), None]
+        with self.lock:
+            self.pending[msg_id] = waiter
+        payload = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            payload["sessionId"] = session_id
+        self.ws.send(json.dumps(payload))
+        if not waiter[0].wait(timeout):
+            with self.lock:
+                self.pending.pop(msg_id, None)
+            raise CdpError(f"{method} timed out after {timeout}s")
+        reply = waiter[1]
+        if reply is None:
+            raise CdpError(f"DevTools connection closed during {method}")
+        if "error" in reply:
+            raise CdpError(f"{method}: {reply['error'].get('message')}")
+        return reply.get("result", {})
+
+    def on(self, method, callback, session_id=None):
+        with self.lock:
+            self.listeners.setdefault((session_id, method), []).append(callback)
+
+    def off(self, method, callback, session_id=None):
+        with self.lock:
+            callbacks = self.listeners.get((session_id, method), [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def close(self):
+        self.closed = True
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+
+def debugger_address(driver):
+    return driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+
+
+def connect_browser(driver):
+    with urllib.request.urlopen(f"http://{debugger_address(driver)}/json/version", timeout=10) as resp:
+        ws_url = json.load(resp)["webSocketDebuggerUrl"]
+    return CdpConnection(ws_url)
+
+
+class Tab:
+    # One page target with its own flattened CDP session. Several Tabs can navigate
+    # and print at the same time inside a single browser process and profile.
+    def __init__(self, conn, target_id=None):
+        self.conn = conn
+        self.owned = target_id is None
+        if target_id is None:
+            target_id = conn.send("Target.createTarget", {"url": "about:blank"})["targetId"]
+        self.target_id = target_id
+        self.session_id = conn.send("Target.attachToTarget",
+                                    {"targetId": target_id, "flatten": True})["sessionId"]
+        self.send("Page.enable")
+        self.send("Page.setLifecycleEventsEnabled", {"enabled": True})
+
+    def send(self, method, params=None, timeout=COMMAND_TIMEOUT):
+        return self.conn.send(method, params, self.session_id, timeout)
+
+    def wait_for_event(self, method, trigger, predicate=None, timeout=NAVIGATION_TIMEOUT):
+        # Subscribe first, then run trigger(), so a fast event can't be missed
+        fired = threading.Event()
+
+        def listener(params):
+            if predicate is None or predicate(params):
+                fired.set()
+
+        self.conn.on(method, listener, self.session_id)
+        try:
+            result = trigger()
+            return fired.wait(timeout), result
+        finally:
+            self.conn.off(method, listener, self.session_id)
+
+    def navigate(self, url, timeout=NAVIGATION_TIMEOUT, until="networkAlmostIdle"):
+        # until: a Page.lifecycleEvent name (DOMContentLoaded, load, networkAlmostIdle, networkIdle)
+        settled, result = self.wait_for_event(
+            "Page.lifecycleEvent", lambda: self.send("Page.navigate", {"url": url}),
+            predicate=lambda p: p.get("name") == until, timeout=timeout)
+        if result.get("errorText"):
+            raise CdpError(f"Navigation to {url} failed: {result['errorText']}")
+        if not settled:
+            logging.warning(f"[TABS] {url} did not reach {until} within {timeout}s")
+        return settled
+
+    def evaluate(self, expression, await_promise=False, timeout=COMMAND_TIMEOUT):
+        result = self.send("Runtime.evaluate", {"expression": expression, "returnByValue": True,
+                                                "awaitPromise": await_promise}, timeout)
+        if "exceptionDetails" in result:
+            raise CdpError(f"Script failed: {result['exceptionDetails'].get('text')}")
+        return result.get("result", {}).get("value")
+
+    def call(self, script, *args):
+        # Runs a Selenium-style script body (uses `arguments`, may `return`)
+        return self.evaluate(f"(function() {{ {script} }}).apply(null, {json.dumps(list(args))})")
+
+    def call_async(self, script, *args, timeout=COMMAND_TIMEOUT):
+        # Like driver.execute_async_script: the last argument is the completion callback
+        expression = (f"new Promise(done => (function() {{ {script} }})"
+                      f".apply(null, {json.dumps(list(args))}.concat([done])))")
+        return self.evaluate(expression, await_promise=True, timeout=timeout)
+
+    def print_pdf(self, output_path, print_options=None):
+        return stream_pdf(lambda method, params: self.send(method, params),
+                          output_path, print_options or PDF_PRINT_OPTIONS)
+
+    def heap_used(self):
+        try:
+            return self.send("Runtime.getHeapUsage").get("usedSize")
+        except CdpError:
+            return None
+
+    def close(self):
+        if self.owned:
+            try:
+                self.conn.send("Target.closeTarget", {"targetId": self.target_id})
+            except CdpError:
+                pass
+
+
+SCROLL_JS = """
+    // Scroll the whole page in the browser to trigger lazy loading, without a round trip per step
+    const done = arguments[arguments.length - 1];
+    const [stepMin, stepMax, pauseMs] = arguments;
+    let pos = 0;
+    (function step() {
+        if (pos >= document.body.scrollHeight) { window.scrollTo(0, 0); return done(pos); }
+        window.scrollTo(0, pos);
+        pos += stepMin + Math.floor(Math.random() * (stepMax - stepMin));
+        setTimeout(step, pauseMs * (0.5 + Math.random()));
+    })();
+"""
+
+
+def scroll_through(tab, step_min=300, step_max=800, pause_ms=150):
+    return tab.call_async(SCROLL_JS, step_min, step_max, pause_ms)
+
+
+def log_tab_memory(driver, tabs):
+    # Compare with the multi-process pool: browser RSS shared by the in-flight tabs
+    from procmem import driver_rss
+
+    rss = driver_rss(driver)
+    heaps = [h for h in (tab.heap_used() for tab in tabs) if h]
+    in_flight = max(1, len(tabs))
+    rss_text = f"{rss / 2**20:.0f} MiB total, {rss / in_flight / 2**20:.0f} MiB per article" if rss else "n/a"
+    heap_text = f"{sum(heaps) / len(heaps) / 2**20:.1f} MiB" if heaps else "n/a"
+    logging.info(f"[TABS] {len(tabs)} in flight | browser RSS {rss_text} | avg JS heap per tab {heap_text}")
+    return rss, heaps
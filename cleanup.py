@@ -0,0 +1,182 @@
+import logging
+
+# ----- Rule sets -----
+POPUP_SELECTORS = [
+    '[class*="popup"]', '[id*="popup"]',
+    '[class*="overlay"]', '[id*="overlay"]',
+    '[class*="modal"]', '[id*="modal"]',
+    '[class*="cookie"]', '[id*="cookie"]',
+    '[class*="subscribe"]', '[id*="subscribe"]',
+]
+
+CLUTTER_SELECTORS = [
+    'header', 'footer', 'nav', 'aside',
+    '[class*="sidebar"]', '[id*="sidebar"]',
+    '[class*="popup"]', '[id*="popup"]',
+    '[class*="overlay"]', '[id*="overlay"]',
+    '[class*="modal"]', '[id*="modal"]',
+    '[class*="ad"]', '[id*="ad"]',
+    '[class*="cookie"]', '[id*="cookie"]',
+    '[class*="banner"]', '[id*="banner"]',
+    '[class*="StickyVideo"]', '[id*="StickyVideo"]',
+    '[class*="VideoHub"]', '[id*="VideoHub"]',
+    'iframe[src*="video"]', 'iframe[src*="youtube"]',
+    'video', 'figure[class*="video"]', 'div[class*="video"]',
+]
+
+CONTENT_ROOTS = ['main', '[role="main"]', '[class*="article"]', '[class*="story"]', '[class*="content"]']
+
+GENTLE_CSS = """
+    body { font-family: Georgia, serif; line-height: 1.6; }
+    img, iframe, video { max-width: 100%; height: auto; }
+    .caption, figcaption, [class*='caption'] {
+        display: block; font-size: 0.9em; color: #555; text-align: center; margin-top: 0.3em;
+    }
+"""
+
+LAYOUT_CSS = """
+    * { box-sizing: border-box !important; max-width: 100% !important; word-wrap: break-word !important; }
+    body {
+        margin: 0 auto; padding: 2em; font-family: Georgia, serif; font-size: 16px;
+        line-height: 1.6; background: white; max-width: 700px;
+    }
+    img, video, iframe { max-width: 100% !important; height: auto !important; }
+    figure { margin-bottom: 1.5em; }
+    figcaption, .caption, [class*="caption"], .MediaCaption__text {
+        display: block; font-size: 0.9em; color: #555; margin-top: 0.3em; text-align: center;
+    }
+"""
+
+CLEANUP_MODES = {
+    "none":       {"remove": [], "roots": [], "hide_fixed": False, "css": ""},
+    "gentle":     {"remove": POPUP_SELECTORS, "roots": [], "hide_fixed": False, "css": GENTLE_CSS},
+    "aggressive": {"remove": CLUTTER_SELECTORS, "roots": CONTENT_ROOTS, "hide_fixed": True, "css": LAYOUT_CSS},
+}
+
+# One pass over the DOM: removal rules are compiled into a single selector and the
+# fixed/sticky check reads the stylesheets instead of calling getComputedStyle on
+# every element. Cross-origin (CDN) sheets cannot be read, so when any was skipped
+# the top few levels of the page, where overlays live, are checked with
+# getComputedStyle as well: reads first, then writes, so that is one recalculation.
+CLEANUP_JS = """
+    const rules = arguments[0];
+    const timings = {};
+    const counts = {visited: 0, removed: 0, hidden: 0, stylesheetRules: 0, unreadableSheets: 0};
+    let last = performance.now();
+    const lap = name => { const now = performance.now(); timings[name] = now - last; last = now; };
+
+    const removeSel = rules.remove.join(',');
+    let fixedSels = [];
+    if (rules.hide_fixed) {
+        const collect = list => {
+            for (const rule of list) {
+                if (rule.cssRules) collect(rule.cssRules);  // @media, @supports, ...
+                const pos = rule.style && rule.style.position;
+                if ((pos === 'fixed' || pos === 'sticky') && rule.selectorText &&
+                    !rule.selectorText.includes('::')) fixedSels.push(rule.selectorText);
+            }
+        };
+        for (const sheet of document.styleSheets) {
+            try { collect(sheet.cssRules); } catch (e) { counts.unreadableSheets++; }
+        }
+        counts.stylesheetRules = fixedSels.length;
+        try { document.documentElement.matches(fixedSels.join(',') || '*'); }
+        catch (e) {
+            fixedSels = fixedSels.filter(sel => {
+                try { document.documentElement.matches(sel); return true; } catch (e) { return false; }
+            });
+        }
+    }
+    const fixedSel = fixedSels.join(',');
+    lap('compile');
+
+    const toRemove = [], toHide = [];
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT, {
+        acceptNode(el) {
+            counts.visited++;
+            if (removeSel && el.matches(removeSel)) { toRemove.push(el); return NodeFilter.FILTER_REJECT; }
+            if (rules.hide_fixed) {
+                const inline = el.style.position;
+                if (inline === 'fixed' || inline === 'sticky' || (fixedSel && el.matches(fixedSel))) toHide.push(el);
+            }
+            return NodeFilter.FILTER_ACCEPT;
+        }
+    });
+    while (walker.nextNode()) {}
+    lap('walk');
+
+    toRemove.forEach(el => el.remove());
+    toHide.forEach(el => { if (el.isConnected) { el.style.display = 'none'; counts.hidden++; } });
+    counts.removed = toRemove.length;
+    lap('apply');
+
+    let root = null;
+    for (const sel of rules.roots) { root = document.querySelector(sel); if (root) break; }
+    if (root) {
+        document.body.innerHTML = '';
+        document.body.appendChild(root.cloneNode(true));
+        Object.assign(document.body.style,
+                      {margin: '2em', fontFamily: 'Georgia, serif', lineHeight: '1.6', background: 'white'});
+    } else if (rules.roots.length) {
+        console.warn('[WARN] No main content found.');
+    }
+    counts.isolated = !!root;
+    lap('isolate');
+
+    if (rules.hide_fixed && counts.unreadableSheets) {
+        const candidates = document.body.querySelectorAll(':scope > *, :scope > * > *, :scope > * > * > *');
+        const floating = Array.from(candidates).filter(el => {
+            if (el.style.display === 'none') return false;  // hidden above already
+            const pos = getComputedStyle(el).position;
+            return pos === 'fixed' || pos === 'sticky';
+        });
+        floating.forEach(el => { el.style.display = 'none'; counts.hidden++; });
+        lap('computed');
+    }
+
+    if (rules.css) {
+        const style = document.createElement('style');
+        style.innerHTML = rules.css;
+        document.head.appendChild(style);
+    }
+    document.body.style.overflow = 'auto';  // undo scroll locks left by modals
+    lap('style');
+
+    counts.nodesAfter = document.body.getElementsByTagName('*').length;
+    return {timings, counts};
+"""
+
+
+def cleanup_rules(mode="gentle", extra_remove=(), content_roots=None):
+    if mode not in CLEANUP_MODES:
+        raise ValueError(f"Unknown cleanup_mode: {mode}")
+    rules = dict(CLEANUP_MODES[mode])
+    rules["remove"] = list(rules["remove"]) + list(extra_remove)
+    if content_roots is not None and rules["roots"]:
+        rules["roots"] = list(content_roots)  # a site's root only narrows modes that isolate the article
+    return rules
+
+
+def describe_cleanup(mode, result):
+    counts, timings = result["counts"], result["timings"]
+    phases = ", ".join(f"{name} {ms:.0f}ms" for name, ms in timings.items())
+    return (f"[CLEANUP] {mode}: visited {counts['visited']} nodes, removed {counts['removed']}, "
+            f"hid {counts['hidden']} fixed/sticky, {counts['nodesAfter']} left ({phases})")
+
+
+def run_cleanup(driver, mode="gentle", extra_remove=(), content_roots=None, report=logging.info):
+    # Works with any Selenium driver (Chrome or Firefox); returns per-phase timings and counts
+    if mode == "none":
+        return None
+    result = driver.execute_script(CLEANUP_JS, cleanup_rules(mode, extra_remove, content_roots))
+    report(describe_cleanup(mode, result))
+    return result
+
+
+def run_cleanup_in_tab(tab, mode="gentle", extra_remove=(), content_roots=None, report=logging.info):
+    # Same engine over a raw DevTools session (cdp_tabs.Tab)
+    if mode == "none":
+        return None
+    result = tab.call(CLEANUP_JS, cleanup_rules(mode, extra_remove, content_roots))
+    report(describe_cleanup(mode, result))
+    return result
@@ -0,0 +1,188 @@
+import os
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ledger import LEDGER_FILE
+
+# ----- Configuration -----
+DELIVERY_URL         = "http://10.11.99.1/upload"  # the tablet's USB web interface (Settings > Storage)
+DELIVERY_CONCURRENCY = 2    # the tablet's web server falls over with many parallel uploads
+UPLOAD_TIMEOUT       = 120
+MAX_ATTEMPTS         = 5    # per run; a file still pending afterwards is retried on the next run
+BACKOFF_BASE         = 2    # seconds, doubled per attempt
+BACKOFF_MAX          = 60
+MEDIA_TYPES = {".pdf": "application/pdf", ".epub": "application/epub+zip"}
+
+
+class TabletDelivery:
+    # Uploads finished files to the tablet while rendering goes on. Every file gets a row in the
+    # ledger database before its first attempt and is marked delivered only once the tablet
+    # accepted it, so a crash or an unplugged cable leaves it pending for the next run instead
+    # of lost, and a delivered file is never sent again.
+    def __init__(self, url=DELIVERY_URL, path=LEDGER_FILE, concurrency=DELIVERY_CONCURRENCY):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS deliveries (
+                path         TEXT PRIMARY KEY,
+                size_bytes   INTEGER,
+                status       TEXT NOT NULL,
+                attempts     INTEGER NOT NULL DEFAULT 0,
+                updated_at   REAL,
+                error        TEXT
+            ) WITHOUT ROWID
+        """)
+        # One keep-alive connection per upload slot; retries are handled here, with backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scribe-deliver")
+        self.in_flight = set()
+        self.delivered = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+
+    def mark(self, path, status, error=None, attempt=False):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO deliveries (path, size_bytes, status, attempts, updated_at, error) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET size_bytes = excluded.size_bytes, "
+                "status = excluded.status, attempts = attempts + ?, updated_at = excluded.updated_at, "
+                "error = excluded.error",
+                (path, os.path.getsize(path) if os.path.exists(path) else None, status, int(attempt),
+                 time.time(), error, int(attempt)))
+
+    def submit(self, path):
+        # Queues one file; returns False when it was delivered before or is already on its way
+        path = os.path.abspath(path)
+        with self.lock:
+            if path in self.in_flight:
+                return False
+            row = self.conn.execute("SELECT status FROM deliveries WHERE path = ?", (path,)).fetchone()
+            if row and row[0] == "delivered":
+                return False
+            self.in_flight.add(path)
+        self.mark(path, "pending")
+        self.pool.submit(self.deliver, path)
+        return True
+
+    def resume(self):
+        # Requeues files an earlier run rendered but could not deliver
+        with self.lock:
+            rows = self.conn.execute("SELECT path FROM deliveries WHERE status = 'pending'").fetchall()
+        missing = [path for (path,) in rows if not os.path.exists(path)]
+        for path in missing:
+            self.mark(path, "missing")
+        resumed = sum(self.submit(path) for (path,) in rows if path not in missing)
+        if resumed:
+            logging.info(f"[DELIVER] Resuming {resumed} undelivered file(s) from an earlier run")
+        return resumed
+
+    def upload(self, path):
+        name = os.path.basename(path)
+        media_type = MEDIA_TYPES.get(os.path.splitext(name)[1].lower(), "application/octet-stream")
+        with open(path, "rb") as f:
+            resp = self.session.post(self.url, files={"file": (name, f, media_type)}, timeout=UPLOAD_TIMEOUT)
+        resp.close()
+        return resp.status_code
+
+    def deliver(self, path):
+        import requests
+
+        name = os.path.basename(path)
+        try:
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                started = time.perf_counter()
+                try:
+                    code = self.upload(path)
+                except (requests.RequestException, OSError) as e:
+                    code, error = None, f"{type(e).__name__}: {e}"
+                else:
+                    error = f"HTTP {code}"
+                if code is not None and 200 <= code < 300:
+                    size = os.path.getsize(path)
+                    self.mark(path, "delivered", attempt=True)
+                    with self.lock:
+                        self.delivered += 1
+                        self.bytes += size
+                    logging.info(f"[DELIVER] {name} ({size / 1024:.0f} KiB) in "
+                                 f"{time.perf_counter() - started:.1f}s")
+                    return True
+                if code is not None and 400 <= code < 500 and code not in (408, 429):
+                    self.mark(path, "failed", error, attempt=True)  # the tablet refused this file
+                    logging.error(f"[DELIVER] {name} rejected: {error}")
+                    return False
+                self.mark(path, "pending", error, attempt=True)
+                if attempt < MAX_ATTEMPTS:
+                    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+                    logging.warning(f"[DELIVER] {name} attempt {attempt} failed ({error}); retrying in {delay}s")
+                    time.sleep(delay)
+            logging.error(f"[DELIVER] {name} still pending after {MAX_ATTEMPTS} attempts; the next run resumes it")
+            return False
+        finally:
+            with self.lock:
+                self.in_flight.discard(path)
+
+    def counts(self):
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM deliveries GROUP BY status").fetchall())
+
+    def close(self):
+        self.pool.shutdown(wait=True)  # lets the uploads already queued finish
+        elapsed = time.monotonic() - self.started
+        if self.delivered:
+            logging.info(f"[DELIVER] {self.delivered} file(s), {self.bytes / 2**20:.1f} MiB delivered "
+                         f"({self.bytes / 2**20 / max(elapsed, 0.001):.2f} MiB/s over the run)")
+        pending = self.counts().get("pending", 0)
+        if pending:
+            logging.warning(f"[DELIVER] {pending} file(s) still pending")
+        self.session.close()
+        with self.lock:
+            self.conn.close()
+        return pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload finished PDFs/EPUBs to the reMarkable over USB.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync = sub.add_parser("sync", help="deliver every file in the given directories that was not delivered yet")
+    sync.add_argument("dirs", nargs="+")
+    sync.add_argument("--url", default=DELIVERY_URL)
+    sync.add_argument("--concurrency", type=int, default=DELIVERY_CONCURRENCY)
+    status = sub.add_parser("status", help="count deliveries by state")
+    for p in (sync, status):
+        p.add_argument("--ledger", default=LEDGER_FILE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    if args.command == "status":
+        delivery = TabletDelivery(path=args.ledger)
+        print(delivery.counts() or "Nothing delivered yet.")
+        delivery.close()
+        return
+
+    delivery = TabletDelivery(args.url, args.ledger, args.concurrency)
+    delivery.resume()
+    queued = 0
+    for directory in args.dirs:
+        for name in sorted(os.listdir(directory)):
+            if os.path.splitext(name)[1].lower() in MEDIA_TYPES:
+                queued += delivery.submit(os.path.join(directory, name))
+    logging.info(f"[DELIVER] {queued} new file(s) queued for {args.url}")
+    sys.exit(1 if delivery.close() else 0)
+
+
+if __name__ == "__main__":
+    main()
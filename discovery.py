@@ -0,0 +1,160 @@
+import time
+import logging
+import sqlite3
+import threading
+
+from extract import extract_all
+from http_session import REQUEST_TIMEOUT, get_session
+from ledger import LEDGER_FILE
+from pacing import SCROLL_JITTER, reset_network_log, sample_jitter, wait_for_assets, wait_for_ready
+
+# ----- Configuration -----
+MAX_LISTING_PAGES = 10  # pages (or scroll steps on endless rivers) read before giving up on reaching known items
+
+SCROLL_PAGE_JS = """
+    const before = document.body.scrollHeight;
+    window.scrollBy(0, window.innerHeight * 2);
+    return [before, window.scrollY + window.innerHeight >= before];
+"""
+
+
+class ListingDiscovery:
+    # Per-listing state lives in the ledger database: HTTP validators for conditional
+    # requests and the newest article link seen, so each run only reads what is new.
+    # That state is only saved once every link found alongside it has been tried, rendered or
+    # not; until then a crash mid-run leaves the listing to be read in full again. A link that
+    # failed stays out of the ledger and is offered again once the listing changes.
+    def __init__(self, path=LEDGER_FILE):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS listings (
+                url           TEXT PRIMARY KEY,
+                etag          TEXT,
+                last_modified TEXT,
+                newest_link   TEXT,
+                checked_at    REAL
+            ) WITHOUT ROWID
+        """)
+        self.queued = set()  # links handed out during this process, still maybe in flight
+        self.unsettled = {}  # listing -> (etag, last_modified, newest_link, links not tried yet)
+        self.tried = set()   # links this process is done with, whether they rendered or failed
+
+    def state(self, url):
+        with self.lock:
+            row = self.conn.execute("SELECT etag, last_modified, newest_link FROM listings WHERE url = ?",
+                                    (url,)).fetchone()
+        return row or (None, None, None)
+
+    def remember(self, url, etag, last_modified, newest_link):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?)",
+                              (url, etag, last_modified, newest_link, time.time()))
+
+    def attempted(self, url):
+        # Called once the caller is done with a link it got from discover()
+        self.tried.add(url)
+
+    def settle(self, ledger):
+        # Saves the state of each listing whose discovered links have all been tried
+        for listing, (etag, last_modified, newest, links) in list(self.unsettled.items()):
+            links = {url for url in links if url not in self.tried and url not in ledger}
+            if links:
+                self.unsettled[listing] = (etag, last_modified, newest, links)
+            else:
+                self.remember(listing, etag, last_modified, newest)
+                del self.unsettled[listing]
+
+    def check(self, url):
+        # Conditional GET of the listing. Returns (changed, etag, last_modified); the body is never read.
+        import requests
+
+        etag, last_modified, _ = self.state(url)
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            resp = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True)
+            resp.close()
+        except requests.RequestException as e:
+            logging.info(f"[DISCOVER] Conditional check failed ({e}), loading the listing anyway")
+            return True, etag, last_modified
+        if resp.status_code == 304:
+            return False, etag, last_modified
+        return True, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+    def next_page(self, driver, site):
+        # Follows the site's "next" link, or scrolls an endless river one step. False at the end.
+        if site.next_page_selector:
+            links = extract_all(driver, site.next_page_selector)
+            if not links:
+                return False
+            driver.get(links[0])
+            wait_for_ready(driver)
+            return True
+        height, at_bottom = driver.execute_script(SCROLL_PAGE_JS)
+        wait_for_assets(driver, timeout=2, in_view_only=True)
+        time.sleep(sample_jitter(SCROLL_JITTER))
+        return not at_bottom or driver.execute_script("return document.body.scrollHeight") > height
+
+    def discover(self, driver, site, ledger, max_pages=MAX_LISTING_PAGES):
+        # Returns new article links, newest first
+        listing = site.listing_url
+        self.settle(ledger)
+        changed, etag, last_modified = self.check(listing)
+        if not changed:
+            logging.info(f"[DISCOVER] {listing} unchanged since last check (HTTP 304)")
+            return []
+        _, _, newest = self.state(listing)
+
+        reset_network_log(driver)
+        driver.get(listing)
+        wait_for_ready(driver)
+        fresh, seen = [], set()
+        first = None
+        for page in range(1, max_pages + 1):
+            reached_known = False
+            for url in extract_all(driver, site.listing_selector):
+                if url in seen:
+                    continue
+                seen.add(url)
+                first = first or url
+                if url in ledger:
+                    reached_known = True  # keep reading this page: an older failure may still be on it
+                    continue
+                if url == newest:
+                    reached_known = True  # an earlier check read everything from here down
+                if url not in self.queued:
+                    fresh.append(url)
+            if reached_known:
+                logging.info(f"[DISCOVER] Reached known articles on page {page}, stopping")
+                break
+            if not self.next_page(driver, site):
+                break
+
+        self.queued.update(fresh)
+        # Links still unsettled from an earlier check keep holding back the new state
+        links = set(fresh) | (self.unsettled[listing][3] if listing in self.unsettled else set())
+        self.unsettled[listing] = (etag, last_modified, first or newest, links)
+        self.settle(ledger)  # nothing new: the state can be saved right away
+        logging.info(f"Found {len(fresh)} new article links.")
+        return fresh
+
+    def poll(self, get_driver, site, ledger, minutes, lock=None):
+        # Endless generator of new links, checking the listing every few minutes. get_driver()
+        # returns the listing driver, which may have been replaced since the last check.
+        while True:
+            time.sleep(minutes * 60)
+            if lock is None:
+                yield from self.discover(get_driver(), site, ledger)
+            else:
+                with lock:
+                    links = self.discover(get_driver(), site, ledger)
+                yield from links
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,99 @@
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+from driver_cache import CACHE_DIR
+
+# ----- Configuration -----
+IMAGE_CACHE_DIR   = os.path.join(CACHE_DIR, "images")
+IMAGE_CACHE_BYTES = 512 * 2**20
+
+
+class DiskLRUCache:
+    # Size-bounded key -> bytes store. Entries are files named by the key's hash; file
+    # mtimes carry recency across runs, so eviction order survives restarts.
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # file name -> size, least recently used first
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self.entries[name] = size
+            self.total += size
+
+    def name_of(self, key):
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        name = self.name_of(key)
+        with self.lock:
+            if name not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(name)
+            self.hits += 1
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:  # evicted by another process
+            with self.lock:
+                self.total -= self.entries.pop(name, 0)
+            return None
+        return data
+
+    def put(self, key, data):
+        name = self.name_of(key)
+        fd, tmp_path = tempfile.mkstemp(prefix=".scribe-", suffix=".part", dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        with self.lock:
+            self.total += len(data) - self.entries.pop(name, 0)
+            self.entries[name] = len(data)
+            evict = []
+            while self.total > self.max_bytes and len(self.entries) > 1:
+                old, size = self.entries.popitem(last=False)
+                self.total -= size
+                evict.append(old)
+        for old in evict:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except OSError:
+                pass
+
+    def describe(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            rate = self.hits / lookups * 100 if lookups else 0
+            return (f"{len(self.entries)} entries, {self.total / 2**20:.1f} of {self.max_bytes / 2**20:.0f} MiB, "
+                    f"{self.hits} hits / {self.misses} misses ({rate:.0f}%)")
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def image_cache():
+    # Shared by print-time image transcoding and the EPUB writer
+    global _image_cache
+    with _image_cache_lock:
+        if _image_cache is None:
+            started = time.perf_counter()
+            _image_cache = DiskLRUCache(IMAGE_CACHE_DIR, IMAGE_CACHE_BYTES)
+            logging.debug(f"[CACHE] Indexed {IMAGE_CACHE_DIR} in {time.perf_counter() - started:.2f}s")
+        return _image_cache
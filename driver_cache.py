@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import logging
+import threading
+
+# Resolved driver binaries are remembered here so a normal launch never has to ask
+# Selenium Manager / webdriver_manager (which may go to the network).
+CACHE_DIR  = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/.cache"),
+                          "RemarkablePageScribe")
+CACHE_FILE = os.path.join(CACHE_DIR, "drivers.json")
+MAX_AGE    = 7 * 24 * 3600  # after this we try to re-resolve, but keep the old path when offline
+
+_lock = threading.Lock()
+
+
+def load_cache():
+    try:
+        with open(CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = CACHE_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, CACHE_FILE)
+
+
+def is_valid(entry):
+    # The binary must still be there, executable and unchanged since we cached it
+    path = entry.get("path")
+    if not path or not os.path.isfile(path) or not os.access(path, os.X_OK):
+        return False
+    stat = os.stat(path)
+    return stat.st_size == entry.get("size") and int(stat.st_mtime) == entry.get("mtime")
+
+
+def remember(name, path):
+    stat = os.stat(path)
+    with _lock:
+        cache = load_cache()
+        cache[name] = {"path": path, "size": stat.st_size, "mtime": int(stat.st_mtime),
+                       "resolved_at": time.time()}
+        save_cache(cache)
+
+
+def invalidate(name):
+    with _lock:
+        cache = load_cache()
+        if cache.pop(name, None) is not None:
+            save_cache(cache)
+
+
+def cached_driver_path(name, resolve):
+    # Returns (path, fresh) where fresh tells whether `resolve` was just called
+    with _lock:
+        entry = load_cache().get(name, {})
+    valid = is_valid(entry)
+    if valid and time.time() - entry.get("resolved_at", 0) < MAX_AGE:
+        return entry["path"], False
+
+    try:
+        path = resolve()
+    except Exception as e:
+        if valid:
+            logging.info(f"[DRIVER] Could not refresh {name} ({e}); using cached {entry['path']}")
+            return entry["path"], False
+        raise
+    remember(name, path)
+    logging.info(f"[DRIVER] Resolved {name} -> {path}")
+    return path, True
+
+
+def launch_driver(name, resolve, start):
+    # start(path) creates the WebDriver. If a cached binary no longer matches the
+    # browser (e.g. Chrome auto-updated), forget it and resolve once more.
+    path, fresh = cached_driver_path(name, resolve)
+    try:
+        return start(path)
+    except Exception as e:
+        if fresh:
+            raise
+        logging.info(f"[DRIVER] Cached {name} failed to start ({e}); re-resolving")
+        invalidate(name)
+        path, _ = cached_driver_path(name, resolve)
+        return start(path)
@@ -0,0 +1,198 @@
+import io
+import os
+import re
+import hashlib
+import logging
+import tempfile
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
+from disk_cache import image_cache
+from http_session import REQUEST_TIMEOUT, get_session
+from pdf_optimize import JPEG_QUALITY
+
+# ----- Configuration -----
+IMAGE_MAX_WIDTH = 1620  # reMarkable Paper Pro screen width in pixels; the reader scales down from here
+MAX_IMAGES      = 40
+DROP_TAGS       = ("noscript", "video", "audio", "svg", "button")
+
+# The metadata timestamp is the article's ISO time with "Z" stripped and ":" replaced for file names
+TIMESTAMP_RE = re.compile(r"(\d{4}-\d{2}-\d{2})(?:T(\d{2})-(\d{2})(?:-(\d{2}(?:\.\d+)?))?(?:([+-]\d{2})-(\d{2}))?)?")
+
+EPUB_CSS = """
+    body { font-family: serif; line-height: 1.5; }
+    h1 { font-size: 1.5em; margin-bottom: 0.2em; }
+    .byline { font-size: 0.85em; color: #555; margin-bottom: 1.5em; }
+    img { max-width: 100%; height: auto; }
+    figure { margin: 1em 0; }
+    figcaption { font-size: 0.8em; color: #555; text-align: center; }
+"""
+
+# The cleaned article subtree, with every image pointing at the URL the browser actually chose
+CONTENT_JS = """
+    const root = (arguments[0] && document.querySelector(arguments[0])) || document.querySelector('article') ||
+                 document.querySelector('main') || document.querySelector('[role="main"]') || document.body;
+    const clone = root.cloneNode(true);
+    const originals = root.querySelectorAll('img');
+    clone.querySelectorAll('img').forEach((img, i) => {
+        const src = originals[i] && (originals[i].currentSrc || originals[i].src);
+        if (src) img.setAttribute('src', src);
+        img.removeAttribute('srcset');
+        img.removeAttribute('loading');
+    });
+    return clone.outerHTML;
+"""
+
+
+def cached_image(url, grayscale=False):
+    # Returns JPEG bytes resized for the device. Each URL is fetched and transcoded once;
+    # later articles (logos, author photos) come out of the shared, size-bounded image cache.
+    cache = image_cache()
+    key = f"epub|{url}|{int(grayscale)}|{IMAGE_MAX_WIDTH}"
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    import requests
+    from PIL import Image
+
+    try:
+        resp = get_session().get(url, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        im = Image.open(io.BytesIO(resp.content))
+        im.thumbnail((IMAGE_MAX_WIDTH, IMAGE_MAX_WIDTH * 4), Image.LANCZOS)
+        if im.mode in ("RGBA", "LA", "P"):
+            im = im.convert("RGBA")
+            background = Image.new("RGB", im.size, "white")
+            background.paste(im, mask=im.getchannel("A"))
+            im = background
+        im = im.convert("L" if grayscale else "RGB")
+        out = io.BytesIO()
+        im.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    except (requests.RequestException, OSError, ValueError, Image.DecompressionBombError) as e:
+        logging.debug(f"[EPUB] Dropping image {url}: {e}")
+        return None
+
+    data = out.getvalue()
+    cache.put(key, data)
+    return data
+
+
+def clean_fragment(body_html, base_url):
+    from lxml import html as lxml_html
+    from lxml.html.clean import Cleaner
+
+    fragment = lxml_html.fragment_fromstring(body_html, create_parent="div")
+    for img in fragment.iter("img"):
+        if not img.get("src") and img.get("data-src"):  # lazy images the fast engine never ran
+            img.set("src", img.get("data-src"))
+    cleaner = Cleaner(scripts=True, javascript=True, style=True, forms=True, embedded=True, frames=True,
+                      comments=True, meta=True, safe_attrs_only=True, kill_tags=list(DROP_TAGS))
+    fragment = cleaner.clean_html(fragment)
+    fragment.make_links_absolute(base_url, resolve_base_href=False)
+    return fragment
+
+
+def embed_images(book, fragment, base_url, grayscale):
+    from ebooklib import epub
+
+    added = {}
+    for i, img in enumerate(list(fragment.iter("img"))):
+        src = img.get("src")
+        if i < MAX_IMAGES and src and not src.startswith("data:"):
+            src = urljoin(base_url, src)
+            name = added.get(src)
+            if name is None:
+                data = cached_image(src, grayscale)
+                if data is not None:
+                    index = len(added)
+                    name = added[src] = f"images/img{index}.jpg"
+                    book.add_item(epub.EpubItem(uid=f"img{index}", file_name=name,
+                                                media_type="image/jpeg", content=data))
+            if name:
+                alt = img.get("alt", "")
+                img.attrib.clear()
+                img.set("src", name)
+                img.set("alt", alt)
+                continue
+        img.drop_tree()
+    return len(added)
+
+
+def article_date(timestamp):
+    # Undoes the file-name mangling of the metadata timestamp. Returns an aware datetime, a date
+    # when there is no time of day, or None; either one's isoformat() is a valid W3CDTF dc:date.
+    match = TIMESTAMP_RE.fullmatch(timestamp or "")
+    if not match:
+        return None
+    day, hour, minute, second, tz_hours, tz_minutes = match.groups()
+    text = day
+    if hour:
+        text += f"T{hour}:{minute}:{second or '00'}" + (f"{tz_hours}:{tz_minutes}" if tz_hours else "")
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if not hour:
+        return parsed.date()
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)  # "Z" was stripped
+
+
+def build_epub(body_html, metadata, url, output_path, grayscale=False):
+    # metadata is (section, title, author, timestamp) as extract_article_metadata returns it
+    from lxml import html as lxml_html
+    from ebooklib import epub
+
+    section, title, author, timestamp = metadata
+    book = epub.EpubBook()
+    book.set_identifier(hashlib.sha1(url.encode("utf-8")).hexdigest())
+    book.set_title(title)
+    book.set_language("en")
+    book.add_author(author)
+    book.add_metadata("DC", "subject", section)
+    published = article_date(timestamp)
+    if published:
+        book.add_metadata("DC", "date", published.isoformat())
+    book.add_metadata("DC", "source", url)
+
+    fragment = clean_fragment(body_html, url)
+    images = embed_images(book, fragment, url, grayscale)
+
+    header = lxml_html.fragment_fromstring("<div><h1></h1><p class='byline'></p></div>")
+    header[0].text = title
+    header[1].text = f"{author} · {section} · {timestamp}"
+    style = epub.EpubItem(uid="style", file_name="style.css", media_type="text/css", content=EPUB_CSS)
+    chapter = epub.EpubHtml(uid="article", title=title, file_name="article.xhtml", lang="en")
+    chapter.content = (lxml_html.tostring(header, encoding="unicode")
+                       + lxml_html.tostring(fragment, encoding="unicode"))
+    chapter.add_item(style)
+    book.add_item(style)
+    book.add_item(chapter)
+    book.toc = (chapter,)
+    book.spine = ["nav", chapter]
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".scribe-", suffix=".part", dir=out_dir)
+    os.close(fd)
+    try:
+        epub.write_epub(tmp_path, book)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    size = os.path.getsize(output_path)
+    logging.info(f"[EPUB] Wrote {size / 1024:.0f} KiB with {images} image(s) to {output_path}")
+    return size
+
+
+def compare_with_pdf(ledger, size, render_ms):
+    # Logs how this EPUB compares with the PDFs the ledger has on record
+    count, pdf_size, pdf_ms = ledger.output_stats(".pdf")
+    if not count or not pdf_size or not pdf_ms:
+        return
+    logging.info(f"[EPUB] {size / 1024:.0f} KiB in {render_ms / 1000:.1f}s vs PDF average "
+                 f"{pdf_size / 1024:.0f} KiB in {pdf_ms / 1000:.1f}s over {count} article(s) "
+                 f"({size / pdf_size:.0%} of the size, {render_ms / pdf_ms:.0%} of the time)")
@@ -0,0 +1,26 @@
+# fields: {name: [css_selector, attribute or null]}; null reads the trimmed text.
+# Everything is resolved in the page, so only the small result dict crosses the wire.
+EXTRACT_FIELDS_JS = """
+    const fields = arguments[0];
+    const out = {};
+    for (const [name, [sel, attr]] of Object.entries(fields)) {
+        const el = document.querySelector(sel);
+        if (!el) { out[name] = null; continue; }
+        out[name] = attr ? el.getAttribute(attr) : el.textContent.trim();
+    }
+    return out;
+"""
+
+EXTRACT_ALL_JS = """
+    const [sel, attr] = arguments;
+    return Array.from(document.querySelectorAll(sel), el => attr === 'href' ? el.href : el.getAttribute(attr));
+"""
+
+
+def extract_fields(driver, fields):
+    spec = {name: [sel, attr] for name, (sel, attr) in fields.items()}
+    return driver.execute_script(EXTRACT_FIELDS_JS, spec)
+
+
+def extract_all(driver, selector, attr="href"):
+    return [v for v in driver.execute_script(EXTRACT_ALL_JS, selector, attr) if v]
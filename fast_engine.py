@@ -0,0 +1,152 @@
+import os
+import logging
+import tempfile
+from urllib.parse import urljoin, urlsplit
+
+import fitz  # PyMuPDF
+import requests
+from lxml import html as lxml_html
+from readability import Document
+
+from http_session import REQUEST_TIMEOUT, get_session
+from pdf_capture import PDF_PRINT_OPTIONS
+
+# ----- Configuration -----
+MIN_TEXT_CHARS  = 1500  # Shorter extractions are teasers or paywall stubs -> use the browser
+MAX_IMAGES      = 20
+LOGIN_MARKERS   = ("login", "signin", "sign-in", "subscribe", "account", "paywall")
+
+# Same page as Page.printToPDF: 5.8 x 8.3 in with 0.4 in margins (72 pt per inch)
+PAGE_RECT    = fitz.Rect(0, 0, PDF_PRINT_OPTIONS["paperWidth"] * 72, PDF_PRINT_OPTIONS["paperHeight"] * 72)
+CONTENT_RECT = PAGE_RECT + (PDF_PRINT_OPTIONS["marginLeft"] * 72, PDF_PRINT_OPTIONS["marginTop"] * 72,
+                            -PDF_PRINT_OPTIONS["marginRight"] * 72, -PDF_PRINT_OPTIONS["marginBottom"] * 72)
+
+ARTICLE_CSS = """
+    body { font-family: serif; font-size: 10pt; line-height: 1.5; }
+    h1 { font-size: 16pt; margin-bottom: 4pt; }
+    h2, h3 { font-size: 12pt; }
+    .byline { font-size: 9pt; color: #555; margin-bottom: 12pt; }
+    figcaption { font-size: 8pt; color: #555; text-align: center; }
+    img { width: 100%; }
+"""
+
+
+def needs_login(resp):
+    if resp.status_code in (401, 402, 403):
+        return True
+    final_path = urlsplit(resp.url).path.lower()
+    return any(marker in final_path for marker in LOGIN_MARKERS)
+
+
+def first_xpath(tree, query):
+    found = tree.xpath(query)
+    if not found:
+        return None
+    value = found[0]
+    return value.strip() if isinstance(value, str) else value.text_content().strip()
+
+
+def extract_metadata(tree, fallback_title):
+    # Atlantic flatplan markup first, then the OpenGraph / article:* tags most sites carry
+    section = (first_xpath(tree, '//*[@data-flatplan-rubric="true"]')
+               or first_xpath(tree, '//meta[@property="article:section"]/@content'))
+    title = (first_xpath(tree, '//*[@data-flatplan-title="true"]')
+             or first_xpath(tree, '//meta[@property="og:title"]/@content')
+             or fallback_title)
+    author = (first_xpath(tree, '//*[@data-flatplan-author-link="true"]')
+              or first_xpath(tree, '//meta[@name="author"]/@content'))
+    iso = (first_xpath(tree, '//time[@data-flatplan-timestamp="true"]/@datetime')
+           or first_xpath(tree, '//meta[@property="article:published_time"]/@content') or "")
+    timestamp = iso.rstrip("Z").replace(":", "-") if iso else "UnknownDate"
+    return section or "Unknown", title or "Unknown", author or "Unknown", timestamp
+
+
+def fetch_article(url):
+    session = get_session()
+    try:
+        resp = session.get(url, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        logging.info(f"[FAST] Fetch failed, falling back to browser: {e}")
+        return None
+    if needs_login(resp):
+        logging.info(f"[FAST] {url} needs a login (HTTP {resp.status_code}), falling back to browser")
+        return None
+    if not resp.ok or "html" not in resp.headers.get("Content-Type", "html"):
+        logging.info(f"[FAST] Unusable response (HTTP {resp.status_code}), falling back to browser")
+        return None
+
+    page_html = resp.text
+    doc = Document(page_html, url=resp.url)
+    body = doc.summary(html_partial=True)
+    text = lxml_html.fromstring(body).text_content().strip() if body.strip() else ""
+    text_len = len(text)
+    if text_len < MIN_TEXT_CHARS:
+        logging.info(f"[FAST] Only {text_len} chars extracted from {url}, falling back to browser")
+        return None
+
+    section, title, author, timestamp = extract_metadata(lxml_html.fromstring(page_html), doc.short_title())
+    logging.info(f"Metadata -> Section: {section}, Title: {title}, Author: {author}, Time: {timestamp}")
+    return {
+        "url": resp.url,
+        "section": section,
+        "title": title,
+        "author": author,
+        "timestamp": timestamp,
+        "body": body,
+        "text": text,
+        "text_len": text_len,
+    }
+
+
+def embed_images(fragment, base_url, archive):
+    session = get_session()
+    for i, img in enumerate(fragment.iter("img")):
+        src = img.get("src") or img.get("data-src")
+        if i >= MAX_IMAGES or not src or src.startswith("data:"):
+            img.drop_tree()
+            continue
+        try:
+            resp = session.get(urljoin(base_url, src), timeout=REQUEST_TIMEOUT)
+            resp.raise_for_status()
+        except requests.RequestException:
+            img.drop_tree()
+            continue
+        name = f"img{i}"
+        archive.add(resp.content, name)
+        img.attrib.clear()
+        img.set("src", name)
+
+
+def render_pdf(article, output_path):
+    fragment = lxml_html.fragment_fromstring(article["body"], create_parent="div")
+    archive = fitz.Archive()
+    embed_images(fragment, article["url"], archive)
+
+    header = lxml_html.fragment_fromstring(
+        "<div><h1></h1><p class='byline'></p></div>")
+    header[0].text = article["title"]
+    header[1].text = f"{article['author']} · {article['section']} · {article['timestamp']}"
+    page_html = lxml_html.tostring(header, encoding="unicode") + lxml_html.tostring(fragment, encoding="unicode")
+
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".scribe-", suffix=".part", dir=out_dir)
+    os.close(fd)
+    try:
+        story = fitz.Story(html=page_html, user_css=ARTICLE_CSS, archive=archive)
+        writer = fitz.DocumentWriter(tmp_path)
+        more = True
+        while more:
+            device = writer.begin_page(PAGE_RECT)
+            more, _ = story.place(CONTENT_RECT)
+            story.draw(device)
+            writer.end_page()
+        writer.close()
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    size = os.path.getsize(output_path)
+    logging.info(f"[FAST] Rendered {size / 1024:.0f} KiB to {output_path}")
+    return size
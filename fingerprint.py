@@ -0,0 +1,143 @@
+import re
+import hashlib
+import logging
+import sqlite3
+import threading
+
+from ledger import LEDGER_FILE
+
+# ----- Configuration -----
+SHINGLE_WORDS  = 3
+MAX_DISTANCE   = 3   # SimHash bits that may differ for a near duplicate
+BANDS          = 4   # 4 x 16-bit bands: any match within 3 bits shares at least one band exactly
+MIN_TEXT_CHARS = 500  # below this the text is a teaser/paywall stub and fingerprints are meaningless
+
+# innerText of the site's content root or the most article-like element; evaluated before cleanup.
+# No document.body fallback: page chrome would make unrelated articles look alike, so such pages aren't deduped.
+ARTICLE_TEXT_JS = """
+    const root = (arguments[0] && document.querySelector(arguments[0])) || document.querySelector('article') ||
+                 document.querySelector('main') || document.querySelector('[role="main"]');
+    return root ? root.innerText : '';
+"""
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text):
+    return " ".join(WORD_RE.findall(text.lower()))
+
+
+def exact_hash(normalized):
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def simhash(normalized, bits=64):
+    words = normalized.split()
+    counts = [0] * bits
+    shingles = (" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1)))
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(bits):
+            counts[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(bits) if counts[bit] > 0)
+
+
+def to_signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def bands_of(value):
+    width = 64 // BANDS
+    return [(band, value >> (band * width) & ((1 << width) - 1)) for band in range(BANDS)]
+
+
+class FingerprintIndex:
+    # Lives in the ledger database, next to the articles table
+    def __init__(self, path=LEDGER_FILE):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                exact     TEXT PRIMARY KEY,
+                simhash   INTEGER NOT NULL,
+                url       TEXT NOT NULL,
+                title     TEXT,
+                render_ms INTEGER
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS fingerprint_bands (
+                band  INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                exact TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS fingerprint_bands_lookup ON fingerprint_bands (band, value);
+        """)
+        self.skipped = 0
+        self.saved_ms = 0
+
+    def fingerprint(self, text):
+        normalized = normalize(text or "")
+        if len(normalized) < MIN_TEXT_CHARS:
+            return None
+        return exact_hash(normalized), simhash(normalized)
+
+    def find(self, fp):
+        # Returns (kind, distance, url, render_ms) for a known article, or None
+        if fp is None:
+            return None
+        exact, value = fp
+        with self.lock:
+            row = self.conn.execute("SELECT url, render_ms FROM fingerprints WHERE exact = ?", (exact,)).fetchone()
+            if row:
+                return "exact", 0, row[0], row[1]
+            candidates = set()
+            for band, band_value in bands_of(value):
+                candidates.update(r[0] for r in self.conn.execute(
+                    "SELECT exact FROM fingerprint_bands WHERE band = ? AND value = ?", (band, band_value)))
+            best = None
+            for candidate in candidates:
+                other, url, render_ms = self.conn.execute(
+                    "SELECT simhash, url, render_ms FROM fingerprints WHERE exact = ?", (candidate,)).fetchone()
+                distance = bin((other & ((1 << 64) - 1)) ^ value).count("1")
+                if distance <= MAX_DISTANCE and (best is None or distance < best[1]):
+                    best = ("near", distance, url, render_ms)
+        return best
+
+    def add(self, fp, url, title=None, render_ms=None):
+        if fp is None:
+            return
+        exact, value = fp
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                cur = self.conn.execute("INSERT OR IGNORE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                                        (exact, to_signed(value), url, title, render_ms))
+                if cur.rowcount:
+                    self.conn.executemany("INSERT INTO fingerprint_bands VALUES (?, ?, ?)",
+                                          [(band, band_value, exact) for band, band_value in bands_of(value)])
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def check(self, text, url):
+        # Fingerprint text and look it up. Returns (fp, match); match is None for new content.
+        fp = self.fingerprint(text)
+        match = self.find(fp)
+        if match:
+            kind, distance, original, render_ms = match
+            with self.lock:
+                self.skipped += 1
+                self.saved_ms += render_ms or 0
+            logging.info(f"[DUPLICATE] {url} is a {kind} duplicate of {original} (distance {distance}); "
+                         f"skipped render, saved ~{(render_ms or 0) / 1000:.1f}s")
+        return fp, match
+
+    def summary(self):
+        if self.skipped:
+            logging.info(f"[DUPLICATE] Skipped {self.skipped} render(s), saving ~{self.saved_ms / 1000:.1f}s")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
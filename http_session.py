@@ -0,0 +1,25 @@
+import threading
+
+# ----- Configuration -----
+USER_AGENT      = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36")
+REQUEST_TIMEOUT = 15
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size=8):
+    # One shared session so keep-alive connections are reused across articles and workers
+    global _session
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"})
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
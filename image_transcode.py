@@ -0,0 +1,200 @@
+import io
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cdp_tabs import CdpError, Tab, connect_browser
+from disk_cache import image_cache
+from pdf_capture import PDF_PRINT_OPTIONS
+from pdf_optimize import JPEG_QUALITY, PAPER_PRO_PPI
+
+# ----- Configuration -----
+# Images never print wider than the content box of the page, so nothing past that many device pixels survives
+PRINT_WIDTH_PX = round((PDF_PRINT_OPTIONS["paperWidth"] - PDF_PRINT_OPTIONS["marginLeft"]
+                        - PDF_PRINT_OPTIONS["marginRight"]) * PAPER_PRO_PPI)  # 5.0in -> 1145 px
+TRANSCODE_THREADS = 4
+SKIP_TYPES = ("image/svg+xml", "image/gif", "image/x-icon", "image/vnd.microsoft.icon")  # vector or animated
+
+# Request stage: cache hits are answered before Chrome touches the network.
+# Response stage: misses are transcoded once they arrive.
+FETCH_PATTERNS = [{"urlPattern": "*", "resourceType": "Image", "requestStage": "Request"},
+                  {"urlPattern": "*", "resourceType": "Image", "requestStage": "Response"}]
+
+
+def header_value(headers, name):
+    for header in headers or ():
+        if header["name"].lower() == name:
+            return header["value"]
+    return ""
+
+
+def transcode(data, grayscale=False, width=PRINT_WIDTH_PX, quality=JPEG_QUALITY):
+    # Returns (bytes, mime), or None when the image can't be read or the original is already smaller
+    from PIL import Image
+
+    try:
+        im = Image.open(io.BytesIO(data))
+        im.draft("L" if grayscale else "RGB", (width, width * 4))  # lets JPEG decode at a reduced scale
+        if im.width > width:
+            im.thumbnail((width, im.height), Image.LANCZOS)
+        if im.mode in ("RGBA", "LA", "P"):
+            im = im.convert("RGBA")
+            background = Image.new("RGB", im.size, "white")  # the page prints on white anyway
+            background.paste(im, mask=im.getchannel("A"))
+            im = background
+        im = im.convert("L" if grayscale else "RGB")
+        out = io.BytesIO()
+        im.save(out, "JPEG", quality=quality, optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logging.debug(f"[IMAGES] Leaving image as is: {e}")
+        return None
+    if out.tell() >= len(data) and not grayscale:
+        return None
+    return out.getvalue(), "image/jpeg"
+
+
+class ImageTranscoder:
+    # Rewrites image responses for every page it is attached to. Shared by all workers/tabs so the
+    # cache, the thread pool and the run totals are shared too.
+    def __init__(self, cache=None, grayscale=False, width=PRINT_WIDTH_PX, quality=JPEG_QUALITY,
+                 threads=TRANSCODE_THREADS):
+        self.cache = cache or image_cache()
+        self.grayscale = grayscale
+        self.width = width
+        self.quality = quality
+        # Paused requests are handled off the CDP reader thread, which has to stay free to read replies
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="scribe-transcode")
+        self.lock = threading.Lock()
+        self.totals = {"cached": 0, "transcoded": 0, "passed": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def key_for(self, url):
+        return f"print|{url}|{int(self.grayscale)}|{self.width}|{self.quality}"
+
+    def cached(self, url):
+        entry = self.cache.get(self.key_for(url))
+        if entry is None:
+            return None
+        mime, _, body = entry.partition(b"\n")
+        return body, mime.decode("ascii")
+
+    def store(self, url, body, mime):
+        self.cache.put(self.key_for(url), mime.encode("ascii") + b"\n" + body)
+
+    def convert(self, url, data, mime):
+        if mime in SKIP_TYPES:
+            result = None
+        else:
+            result = transcode(data, self.grayscale, self.width, self.quality)
+        body, out_mime = result or (data, mime or "application/octet-stream")
+        self.store(url, body, out_mime)  # pass-throughs are cached too: the next hit skips the network
+        return body, out_mime, result is not None
+
+    def count(self, counts, kind, bytes_in=0, bytes_out=0):
+        with self.lock:
+            for target in (counts, self.totals):
+                target[kind] += 1
+                target["bytes_in"] += bytes_in
+                target["bytes_out"] += bytes_out
+
+    def attach(self, conn, session_id, owns_conn=False):
+        return Interception(self, conn, session_id, owns_conn)
+
+    def attach_tab(self, tab):
+        return self.attach(tab.conn, tab.session_id)
+
+    def attach_driver(self, driver):
+        # execute_cdp_cmd can't receive Fetch.requestPaused, so the driver's page gets a second,
+        # event-capable session on its own DevTools connection. Window handles are target ids.
+        conn = connect_browser(driver)
+        page = Tab(conn, target_id=driver.current_window_handle)
+        return self.attach(conn, page.session_id, owns_conn=True)
+
+    def summary(self):
+        with self.lock:
+            t = dict(self.totals)
+        images = t["cached"] + t["transcoded"] + t["passed"]
+        if images:
+            logging.info(f"[IMAGES] Run total: {images} image(s), {t['cached']} from cache, {t['transcoded']} "
+                         f"transcoded, {t['passed']} passed through; {t['bytes_in'] / 2**20:.1f} MiB fetched, "
+                         f"{t['bytes_out'] / 2**20:.1f} MiB handed to Chrome")
+            logging.info(f"[IMAGES] Cache: {self.cache.describe()}")
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+class Interception:
+    # Fetch interception on one CDP session
+    def __init__(self, transcoder, conn, session_id, owns_conn=False):
+        self.transcoder = transcoder
+        self.conn = conn
+        self.session_id = session_id
+        self.owns_conn = owns_conn
+        self.counts = {"cached": 0, "transcoded": 0, "passed": 0, "bytes_in": 0, "bytes_out": 0}
+        conn.on("Fetch.requestPaused", self.on_paused, session_id)
+        self.send("Fetch.enable", {"patterns": FETCH_PATTERNS})
+
+    def send(self, method, params):
+        return self.conn.send(method, params, self.session_id)
+
+    def on_paused(self, params):
+        self.transcoder.pool.submit(self.handle, params)
+
+    def handle(self, params):
+        request_id = params["requestId"]
+        url = params["request"]["url"]
+        try:
+            at_response = "responseStatusCode" in params or "responseErrorReason" in params
+            hit = self.transcoder.cached(url)
+            if hit is not None:
+                self.fulfill(request_id, *hit)
+                self.transcoder.count(self.counts, "cached", bytes_out=len(hit[0]))
+            elif not at_response or params.get("responseStatusCode") != 200:
+                self.send("Fetch.continueRequest", {"requestId": request_id})
+            else:
+                reply = self.send("Fetch.getResponseBody", {"requestId": request_id})
+                body = reply["body"]
+                data = base64.b64decode(body) if reply.get("base64Encoded") else body.encode("utf-8")
+                mime = header_value(params.get("responseHeaders"), "content-type").split(";")[0].strip()
+                out, out_mime, converted = self.transcoder.convert(url, data, mime)
+                self.fulfill(request_id, out, out_mime)
+                self.transcoder.count(self.counts, "transcoded" if converted else "passed", len(data), len(out))
+        except CdpError as e:  # the page navigated away or the tab closed mid-request
+            logging.debug(f"[IMAGES] {url}: {e}")
+        except Exception as e:
+            logging.warning(f"[IMAGES] Could not transcode {url}: {e}")
+            try:
+                self.send("Fetch.continueRequest", {"requestId": request_id})
+            except CdpError:
+                pass
+
+    def fulfill(self, request_id, body, mime):
+        self.send("Fetch.fulfillRequest", {
+            "requestId": request_id,
+            "responseCode": 200,
+            "responseHeaders": [{"name": "Content-Type", "value": mime},
+                                {"name": "Content-Length", "value": str(len(body))},
+                                {"name": "Access-Control-Allow-Origin", "value": "*"}],
+            "body": base64.b64encode(body).decode("ascii"),
+        })
+
+    def page_summary(self, url):
+        with self.transcoder.lock:
+            c = dict(self.counts)
+            for key in self.counts:
+                self.counts[key] = 0
+        images = c["cached"] + c["transcoded"] + c["passed"]
+        if images:
+            logging.info(f"[IMAGES] {images} image(s) on {url}: {c['cached']} cached, {c['transcoded']} transcoded "
+                         f"({c['bytes_in'] / 1024:.0f} -> {c['bytes_out'] / 1024:.0f} KiB)")
+        return c
+
+    def close(self):
+        self.conn.off("Fetch.requestPaused", self.on_paused, self.session_id)
+        try:
+            self.send("Fetch.disable", {})
+        except CdpError:
+            pass
+        if self.owns_conn:
+            self.conn.close()
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import sqlite3
+import logging
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+LEDGER_FILE = "downloads.sqlite3"
+
+# Query parameters that only track where a click came from; they never change the article.
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src",
+                   "referrer", "source", "src", "smid", "smtyp", "cmpid", "s_cid", "share", "amp"}
+TRACKING_PREFIXES = ("utm_", "__twitter", "_hs", "vero_", "oly_")
+
+
+def canonicalize_url(url):
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    if scheme == "http":
+        scheme = "https"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    # Fragments never reach the server, so they are always dropped
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+class DownloadLedger:
+    # SQLite in WAL mode: every record is its own transaction, so a crash
+    # mid-write loses at most the article in flight and never corrupts history.
+    def __init__(self, path=LEDGER_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                url_key      TEXT PRIMARY KEY,
+                url          TEXT NOT NULL,
+                title        TEXT,
+                downloaded_at REAL,
+                output_path  TEXT,
+                size_bytes   INTEGER,
+                render_ms    INTEGER
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key   TEXT PRIMARY KEY,
+                value TEXT
+            ) WITHOUT ROWID;
+        """)
+
+    def __contains__(self, url):
+        return self.get(url) is not None
+
+    def get(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT url, title, downloaded_at, output_path, size_bytes, render_ms "
+                "FROM articles WHERE url_key = ?", (canonicalize_url(url),)).fetchone()
+        if row is None:
+            return None
+        keys = ("url", "title", "downloaded_at", "output_path", "size_bytes", "render_ms")
+        return dict(zip(keys, row))
+
+    def record(self, url, title=None, output_path=None, size_bytes=None, render_ms=None):
+        if size_bytes is None and output_path and os.path.exists(output_path):
+            size_bytes = os.path.getsize(output_path)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (canonicalize_url(url), url, title, time.time(), output_path, size_bytes, render_ms))
+        logging.info(f"Marked as downloaded: {url}")
+
+    def update_size(self, url, size_bytes):
+        with self.lock:
+            self.conn.execute("UPDATE articles SET size_bytes = ? WHERE url_key = ?",
+                              (size_bytes, canonicalize_url(url)))
+
+    def import_text_file(self, track_file):
+        # One-shot migration of the old downloaded_articles.txt
+        marker = f"imported:{os.path.abspath(track_file)}"
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+                return 0
+        if not os.path.exists(track_file):
+            return 0
+
+        mtime = os.path.getmtime(track_file)
+        with open(track_file) as f:
+            rows = ((canonicalize_url(line), line.strip(), mtime) for line in f if line.strip())
+            with self.lock:
+                self.conn.execute("BEGIN")
+                try:
+                    before = self.conn.total_changes
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO articles (url_key, url, downloaded_at) VALUES (?, ?, ?)", rows)
+                    imported = self.conn.total_changes - before
+                    self.conn.execute("INSERT INTO meta VALUES (?, ?)", (marker, str(time.time())))
+                    self.conn.execute("COMMIT")
+                except BaseException:
+                    self.conn.execute("ROLLBACK")
+                    raise
+        logging.info(f"[LEDGER] Imported {imported} URLs from {track_file}")
+        return imported
+
+    def output_stats(self, suffix):
+        # (articles, average bytes, average render ms) for outputs ending in suffix, e.g. ".pdf"
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*), AVG(size_bytes), AVG(render_ms) FROM articles "
+                "WHERE output_path LIKE ? AND size_bytes IS NOT NULL AND render_ms > 0",
+                (f"%{suffix}",)).fetchone()
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def open_ledger(path=LEDGER_FILE, track_file=None):
+    ledger = DownloadLedger(path)
+    if track_file:
+        ledger.import_text_file(track_file)
+    return ledger
+
+
+if __name__ == "__main__":
+    # python ledger.py import downloaded_articles.txt [downloads.sqlite3]
+    if len(sys.argv) < 3 or sys.argv[1] != "import":
+        print("Usage: python ledger.py import <downloaded_articles.txt> [ledger.sqlite3]")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    ledger = open_ledger(sys.argv[3] if len(sys.argv) > 3 else LEDGER_FILE)
+    ledger.import_text_file(sys.argv[2])
+    print(f"{ledger.count()} articles in {ledger.path}")
+    ledger.close()
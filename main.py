@@ -1,63 +1,97 @@
+from startup import StartupProfile
 import os
 import time
 import random
-import base64
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-# from selenium.webdriver.chrome.service import Service  # not needed with Selenium Manager
-from selenium.common.exceptions import WebDriverException
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
+import heapq
+import queue
+import itertools
+import argparse
+import functools
+import contextlib
+import threading
+# Selenium, lxml and PyMuPDF are imported inside the functions that use them, so a
+# plain import of this module (or a fast-engine run) never pays for them.
 # from webdriver_manager.chrome import ChromeDriverManager  # <-- removed, caused bad path
-from bs4 import BeautifulSoup
 from datetime import datetime
+from batch import CHECKPOINT_FILE, BatchProgress
+from blocking import RequestBlocker, log_run_total
+from cdp_tabs import Tab, connect_browser, log_tab_memory, scroll_through
+from cleanup import run_cleanup, run_cleanup_in_tab
+from delivery import DELIVERY_URL
+from discovery import ListingDiscovery
+from driver_cache import launch_driver
+from extract import EXTRACT_FIELDS_JS, extract_fields
+from fingerprint import ARTICLE_TEXT_JS, FingerprintIndex
+from ledger import open_ledger
+from metrics import ArticleTrace, close_metrics, open_metrics
+from pacing import (DomainRateLimiter, READY_TIMEOUT, SCROLL_JITTER, SETTLE_JS, domain_of,
+                    reset_network_log, sample_jitter, wait_for_assets, wait_for_ready)
+from profiles import clone_profile
+from site_profiles import EAGER_IMAGES_JS, get_profile, profile_for
+from snapshots import SnapshotArchive, capture_snapshot
+from supervisor import DriverSupervisor, SharedBrowser
+from pdf_capture import PDF_PRINT_OPTIONS, stream_pdf
+from pipeline import Pipeline
 
 # ----- Configuration -----
-BASE_URL       = "https://www.theatlantic.com"
-LATEST_URL     = f"{BASE_URL}/latest/"
+LISTING_SITE   = "atlantic"  # site profile whose listing page a normal run crawls
 OUTPUT_DIR     = r"C:\Users\efv\Desktop\news_scrapers\RemarkablePageScribe\downloads"
-TRACK_FILE     = "downloaded_articles.txt"
+TRACK_FILE     = "downloaded_articles.txt"  # Legacy list, imported into the ledger once
+LEDGER_FILE    = "downloads.sqlite3"
 USER_DATA_DIR  = r"C:\temp\chrome_test"
 PROFILE_NAME   = "Default"
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+WORKERS        = 1  # Number of parallel Chrome drivers (capped at the core count)
+WRITE_WORKERS  = 2  # threads decoding/writing PDFs and building EPUBs behind the browsers
+TABS           = 0  # >0 renders that many tabs at once inside a single Chrome instead
+DOMAIN_RATE    = 6  # Article loads per minute per domain (token bucket)
+ENGINE         = "selenium"  # "fast" tries requests + readability + PyMuPDF before the browser
+BLOCK_CATEGORIES = ("ads", "analytics", "video", "fonts")  # request types Chrome never fetches
+SITE_ALLOW     = {}  # {domain: [category or URL pattern]} to let through on that site
+DEDUP          = True  # skip renders whose text matches (or nearly matches) an earlier article
+OPTIMIZE_PDFS  = False  # shrink images/fonts in a process pool after each PDF is written
+MAX_DEFERRED   = 50  # Throttled URLs a worker holds aside before it just waits
+CLEANUP_MODE   = "none"  # for sites whose profile leaves it open: "gentle", "aggressive" or "none"
+OUTPUT_FORMAT  = "pdf"  # "epub" builds a reflowable book from the cleaned DOM instead of printing
+TRANSCODE_IMAGES = False  # shrink images to the printable width as Chrome loads them, via a disk cache
+SNAPSHOTS      = False  # keep a gzipped MHTML of every cleaned page so PDFs can be rebuilt offline
 
 # ----- Logging Setup -----
-LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+def setup_logging():
+    os.makedirs(LOG_DIR, exist_ok=True)
 
-timestamp_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-log_file_path = os.path.join(LOG_DIR, f"scraper_{timestamp_str}.log")
+    timestamp_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_file_path = os.path.join(LOG_DIR, f"scraper_{timestamp_str}.log")
 
-# Create logger
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+    # Create logger
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
 
-# Clear any existing handlers
-if logger.hasHandlers():
-    logger.handlers.clear()
+    # Clear any existing handlers
+    if logger.hasHandlers():
+        logger.handlers.clear()
 
-# File handler
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel(logging.INFO)
+    # File handler
+    file_handler = logging.FileHandler(log_file_path)
+    file_handler.setLevel(logging.INFO)
 
-# Console (stream) handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
+    # Console (stream) handler
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
 
-# Formatter
-formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", "%Y-%m-%d %H:%M:%S")
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
+    # Formatter
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", "%Y-%m-%d %H:%M:%S")
+    file_handler.setFormatter(formatter)
+    console_handler.setFormatter(formatter)
 
-# Add handlers
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+    # Add handlers
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
 
-logger.info("=== Script Start ===")
+    logger.info("=== Script Start ===")
+    return log_file_path
 
 def sanitize_filename(name):
     name = name.replace(":", " - ").replace("/", "-").replace("?", "").replace('"', '').replace(".", "")
@@ -65,129 +99,653 @@ def sanitize_filename(name):
     cleaned = "".join(c for c in name if c.isalnum() or c in keep)
     return cleaned.strip().replace("  ", " ")  # collapse double spaces
 
-def create_driver():
+post_processor = None  # pdf_optimize.PostProcessor when --optimize is on
+fingerprints   = None  # fingerprint.FingerprintIndex when dedup is on
+batch_progress = None  # batch.BatchProgress when --batch is given
+listing_lock   = threading.Lock()  # the listing driver is shared by discovery and worker 0 or the tabs (and their restarts)
+output_format  = OUTPUT_FORMAT  # set from --format; a site profile can override it
+grayscale_images = False  # --grayscale: also applies to EPUB images
+image_transcoder = None  # image_transcode.ImageTranscoder when --transcode-images is on
+delivery       = None  # delivery.TabletDelivery when --deliver is on
+pipeline       = None  # pipeline.Pipeline carrying articles from the browsers to disk, ledger and tablet
+browser_stage  = None  # the browsers' entry in that pipeline's utilization report
+snapshot_archive = None  # snapshots.SnapshotArchive when --snapshots is on
+discovery      = None  # discovery.ListingDiscovery when reading the listing instead of --batch
+
+defer_seq = itertools.count()  # tie-breaker so the deferred heap never compares URLs
+
+def resolve_chromedriver(opts):
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.driver_finder import DriverFinder
+    return DriverFinder(Service(), opts).get_driver_path()
+
+def create_driver(user_data_dir=USER_DATA_DIR):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
     opts = Options()
     opts.add_argument("--start-maximized")
-    opts.add_argument(f"--user-data-dir={USER_DATA_DIR}")
+    opts.add_argument(f"--user-data-dir={user_data_dir}")
     opts.add_argument(f"--profile-directory={PROFILE_NAME}")
     opts.add_argument("--disable-blink-features=AutomationControlled")
     opts.add_argument("--headless=new")  # Comment this out to see browser
+    # Return from driver.get at DOMContentLoaded; wait_for_ready decides when the page has settled
+    opts.page_load_strategy = "eager"
+    opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
     # === FIX: Use Selenium Manager instead of webdriver_manager ===
     # This avoids the WinError 193 from picking a non-executable file.
-    return webdriver.Chrome(options=opts)
+    # The resolved path is cached, so later launches skip Selenium Manager and work offline.
+    return launch_driver("chromedriver", lambda: resolve_chromedriver(opts),
+                         lambda path: webdriver.Chrome(service=Service(path), options=opts))
 
 def act_human(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.action_chains import ActionChains
+
     height = driver.execute_script("return document.body.scrollHeight")
     for pos in range(0, height, random.randint(300, 800)):
         driver.execute_script(f"window.scrollTo(0, {pos});")
-        time.sleep(random.uniform(0.5, 1.5))
-    elems = driver.find_elements(By.CSS_SELECTOR, "img, a.LandingRiver_titleLink__nUImQ")
+        wait_for_assets(driver, timeout=2, in_view_only=True)  # let lazy images in view load
+        time.sleep(sample_jitter(SCROLL_JITTER))
+    elems = driver.find_elements(By.CSS_SELECTOR, "img, a[href]")
     if elems:
         el = random.choice(elems)
         try:
             ActionChains(driver).move_to_element(el).perform()
-            time.sleep(random.uniform(1.0, 2.0))
+            time.sleep(sample_jitter(SCROLL_JITTER))
         except Exception as e:
             logging.warning(f"Hovering failed: {e}")
 
-def extract_article_metadata(driver):
-    try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '[data-flatplan-title="true"]'))
-        )
-    except:
-        logging.warning("Timed out waiting for article content to load.")
-
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-
-    def sel_text(q):
-        el = soup.select_one(q)
-        return el.get_text(strip=True) if el else "Unknown"
-
-    def sel_attr(q, attr):
-        el = soup.select_one(q)
-        return el.get(attr) if el and el.has_attr(attr) else None
-
-    section = sel_text('[data-flatplan-rubric="true"]')
-    title   = sel_text('[data-flatplan-title="true"]')
-    author  = sel_text('[data-flatplan-author-link="true"]')
-    iso     = sel_attr('time[data-flatplan-timestamp="true"]', "datetime") or ""
+def prepare_page(driver, site):
+    # Known sites skip the full scroll; lazy images are just told to load now
+    if site.scroll:
+        act_human(driver)
+    else:
+        driver.execute_script(EAGER_IMAGES_JS)
+
+def extract_article_metadata(driver, site):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    if site.ready_selector:
+        try:
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, site.ready_selector))
+            )
+        except:
+            logging.warning("Timed out waiting for article content to load.")
+
+    return metadata_from_fields(extract_fields(driver, site.metadata))
+
+def metadata_from_fields(fields):
+    section = fields["section"] or "Unknown"
+    title   = fields["title"] or "Unknown"
+    author  = fields["author"] or "Unknown"
+    iso     = fields["iso"] or ""
     timestamp = iso.rstrip("Z").replace(":", "-") if iso else "UnknownDate"
 
     logging.info(f"Metadata -> Section: {section}, Title: {title}, Author: {author}, Time: {timestamp}")
     return section, title, author, timestamp
 
-def save_page_as_pdf(driver, output_path):
-    time.sleep(random.uniform(2, 5))
-    pdf_data = driver.execute_cdp_cmd("Page.printToPDF", {
-        "printBackground": True,
-        "paperWidth": 5.8,
-        "paperHeight": 8.3,
-        "marginTop": 0.4,
-        "marginBottom": 0.4,
-        "marginLeft": 0.4,
-        "marginRight": 0.4,
-        "scale": 0.9,
-    })["data"]
-    with open(output_path, "wb") as f:
-        f.write(base64.b64decode(pdf_data))
+class Rendered:
+    # An article the browser (or the fast engine) is done with, on its way to disk and the ledger
+    def __init__(self, url, metadata, fp, trace, kind, payload, browser_ms=0, snapshot=None, cleanup_mode=None):
+        self.url = url
+        self.metadata = metadata  # (section, title, author, timestamp)
+        self.fp = fp
+        self.trace = trace
+        self.kind = kind  # "pdf": already on disk, "epub": article HTML, "fast": a fast_engine article
+        self.payload = payload  # None for "pdf"; only the path travels down the pipeline
+        self.browser_ms = browser_ms
+        self.snapshot = snapshot  # MHTML of the cleaned page with --snapshots
+        self.cleanup_mode = cleanup_mode
+        self.output_path = None
+        self.render_ms = None
+
+def print_page(send, output_path, trace):
+    # The printToPDF stream is decoded chunk by chunk into the file here, in the browser stage, so
+    # a queued article never holds its PDF in memory. Returns ms.
+    started = time.monotonic()
+    with trace.span("print") as span:
+        span["bytes"] = stream_pdf(send, output_path, PDF_PRINT_OPTIONS)
     logging.info(f"Saved PDF to: {output_path}")
-
-def load_downloaded_articles():
-    if not os.path.exists(TRACK_FILE):
-        return set()
-    with open(TRACK_FILE) as f:
-        return set(line.strip() for line in f)
-
-def mark_article_downloaded(url):
-    with open(TRACK_FILE, "a") as f:
-        f.write(url + "\n")  # <-- FIX: real newline
-    logging.info(f"Marked as downloaded: {url}")
-
-def get_article_links(driver):
-    driver.get(LATEST_URL)
-    time.sleep(random.uniform(5, 15))
-    act_human(driver)
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    links = list({a["href"] for a in soup.select("a.LandingRiver_titleLink__nUImQ[href^='https://']")})
-    logging.info(f"Found {len(links)} article links.")
-    return links
-
-def main():
-    seen = load_downloaded_articles()
-    driver = create_driver()
-
-    links = get_article_links(driver)
-
-    for url in links:
-        if url in seen:
-            logging.info(f"[SKIP] Already downloaded: {url}")
-            continue
-
+    return int((time.monotonic() - started) * 1000)
+
+def take_snapshot(send, trace):
+    # MHTML of the cleaned page for offline re-rendering; compressed and stored in the write stage
+    if snapshot_archive is None:
+        return None
+    with trace.span("snapshot") as span:
+        mhtml = capture_snapshot(send)
+        span["chars"] = len(mhtml)
+    return mhtml
+
+def hand_off(job):
+    # Blocks while the write stage is full, so browsers never run ahead of the disk
+    pipeline.put(job)
+    return job
+
+def write_output(ledger, job):
+    # Stage "write": EPUB building or fast-engine layout; PDFs were written by the browser stage.
+    # ebooklib, lxml and PyMuPDF are only imported once those outputs are used.
+    started = time.monotonic()
+    if job.kind == "epub":
+        import epub_output
+        job.output_path = build_output_path(*job.metadata, ext=".epub")
+        with job.trace.span("epub") as span:
+            span["bytes"] = epub_output.build_epub(job.payload, job.metadata, job.url, job.output_path,
+                                                   grayscale_images)
+    elif job.kind == "fast":
+        import fast_engine
+        job.output_path = build_output_path(*job.metadata)
+        with job.trace.span("render", engine="fast") as span:
+            span["bytes"] = fast_engine.render_pdf(job.payload, job.output_path)
+    job.payload = None  # the HTML is not needed past this stage
+    if job.snapshot is not None:
+        with job.trace.span("archive") as archived:
+            job.snapshot = snapshot_archive.store(job.snapshot)  # (content_hash, file, size) from here on
+            archived["bytes"] = job.snapshot[2]
+    job.render_ms = job.browser_ms + int((time.monotonic() - started) * 1000)
+    if job.kind == "epub":
+        epub_output.compare_with_pdf(ledger, span["bytes"], job.render_ms)
+    return job
+
+def optimize_output(job):
+    # Stage "optimize": one thread per post-processor process, each waiting on its PDF
+    if job.output_path.endswith(".pdf"):
         try:
-            logging.info(f"[NAVIGATE] {url}")
+            post_processor.submit(job.output_path).result()
+        except Exception:
+            pass  # the post-processor logged it; the unoptimized file stays
+    return job
+
+def record_output(ledger, job):
+    # Stage "sink": the file is final now, so the ledger records its real size
+    mark_article_downloaded(ledger, job.url, job.metadata[1], job.output_path, job.render_ms)
+    remember_fingerprint(job.fp, job.url, job.metadata[1], job.render_ms)
+    if job.snapshot is not None:
+        snapshot_archive.record(job.url, *job.snapshot[:2], job.metadata, job.cleanup_mode, job.snapshot[2])
+    return job
+
+def article_done(url):
+    # Every URL the browsers are finished with for good: written, skipped or failed, but not requeued
+    if batch_progress:
+        batch_progress.finish(url)
+    if discovery:
+        discovery.attempted(url)
+
+def finish_article(job):
+    # Called by the pipeline for every article that leaves it, written or not
+    article_done(job.url)
+
+def build_pipeline(ledger, browsers, url_queue):
+    global pipeline, browser_stage
+    pipeline = Pipeline(done=finish_article)
+    browser_stage = pipeline.track("browser", browsers, url_queue)
+    pipeline.stage("write", functools.partial(write_output, ledger), WRITE_WORKERS)
+    if post_processor:
+        pipeline.stage("optimize", optimize_output, post_processor.workers)
+    pipeline.stage("sink", functools.partial(record_output, ledger), 1)  # SQLite serializes writers anyway
+    return pipeline.start()
+
+def mark_article_downloaded(ledger, url, title=None, output_path=None, render_ms=None):
+    # The ledger serializes writers, so several workers can finish at once
+    ledger.record(url, title=title, output_path=output_path, render_ms=render_ms)
+    if delivery and output_path:
+        delivery.submit(output_path)
+
+def skip_if_duplicate(ledger, url, title, text):
+    # Returns (skipped, fingerprint); the fingerprint is stored once the article is rendered
+    if fingerprints is None:
+        return False, None
+    fp, match = fingerprints.check(text, url)
+    if match is None:
+        return False, fp
+    original = ledger.get(match[2]) or {}
+    ledger.record(url, title=title, output_path=original.get("output_path"), render_ms=0)
+    return True, fp
+
+def remember_fingerprint(fp, url, title, render_ms):
+    if fingerprints is not None:
+        fingerprints.add(fp, url, title, render_ms)
+
+def build_output_path(section, title, author, timestamp, ext=".pdf"):
+    raw_name = f"{timestamp} [{section}] {title} - {author}"
+    filename = sanitize_filename(raw_name) + ext
+    return os.path.join(OUTPUT_DIR, filename)
+
+def format_for(site):
+    return site.output_format or output_format
+
+def process_article_fast(url, ledger):
+    # Returns (handled, job): handled is False when the browser has to take over
+    import fast_engine
+
+    trace = ArticleTrace(url)
+    try:
+        with trace.span("fetch"):
+            article = fast_engine.fetch_article(url)
+        if article is None:
+            trace.outcome = "fallback"
+            return False, None
+
+        skipped, fp = skip_if_duplicate(ledger, url, article["title"], article["text"])
+        if skipped:
+            trace.outcome = "duplicate"
+            return True, None
+
+        metadata = (article["section"], article["title"], article["author"], article["timestamp"])
+        if format_for(profile_for(url)) == "epub":
+            job = hand_off(Rendered(url, metadata, fp, trace, "epub", article["body"]))
+        else:
+            job = hand_off(Rendered(url, metadata, fp, trace, "fast", article))
+        trace.outcome = "rendered"
+        return True, job
+    finally:
+        trace.finish()
+
+def process_article(driver, url, ledger, engine=ENGINE, blocker=None, images=None):
+    # Returns the job handed to the write stage, or None (duplicate)
+    if engine == "fast":
+        handled, job = process_article_fast(url, ledger)
+        if handled:
+            return job
+
+    logging.info(f"[NAVIGATE] {url}")
+    trace = ArticleTrace(url, driver.execute_cdp_cmd)
+    try:
+        reset_network_log(driver)
+        if blocker:
+            blocker.apply(driver, url)
+        with trace.span("get"):
             driver.get(url)
-            act_human(driver)
-
-            section, title, author, timestamp = extract_article_metadata(driver)
-            raw_name = f"{timestamp} [{section}] {title} - {author}"
-            filename = sanitize_filename(raw_name) + ".pdf"
-            outpath  = os.path.join(OUTPUT_DIR, filename)
-
-            save_page_as_pdf(driver, outpath)
-            mark_article_downloaded(url)
-
-            driver.get(LATEST_URL)
-            wait = random.uniform(5, 15)
-            logging.info(f"[WAIT] Sleeping for {wait:.1f}s before next article")
-            time.sleep(wait)
-
-        except Exception as e:
-            logging.error(f"[ERROR] Could not process {url}: {e}")
+        site = profile_for(url)
+        with trace.span("act_human", site=site.name, scroll=site.scroll):
+            prepare_page(driver, site)
+
+        with trace.span("metadata"):
+            section, title, author, timestamp = extract_article_metadata(driver, site)
+        text = driver.execute_script(ARTICLE_TEXT_JS, site.content_root) if fingerprints else None
+        skipped, fp = skip_if_duplicate(ledger, url, title, text)
+        if skipped:
+            trace.outcome = "duplicate"
+            return None
+        cleanup_mode = site.cleanup_mode or CLEANUP_MODE
+        with trace.span("cleanup") as span:
+            cleaned = run_cleanup(driver, cleanup_mode, site.remove, site.content_roots())
+            if cleaned:
+                span["removed"] = cleaned["counts"]["removed"]
+
+        metadata = (section, title, author, timestamp)
+        if format_for(site) == "epub":
+            from epub_output import CONTENT_JS
+            job = Rendered(url, metadata, fp, trace, "epub", driver.execute_script(CONTENT_JS, site.content_root))
+        else:
+            with trace.span("ready"):
+                wait_for_ready(driver)
+            output_path = build_output_path(*metadata)
+            job = Rendered(url, metadata, fp, trace, "pdf", None,
+                           print_page(driver.execute_cdp_cmd, output_path, trace))
+            job.output_path = output_path
+        job.snapshot, job.cleanup_mode = take_snapshot(driver.execute_cdp_cmd, trace), cleanup_mode
+        if blocker:
+            reset_network_log(driver)  # hands the last events to the blocker's counters
+            blocker.page_summary(url)
+        if images:
+            images.page_summary(url)
+        trace.outcome = "rendered"
+        return hand_off(job)
+    finally:
+        trace.finish()
+
+def process_article_in_tab(tab, url, ledger, engine=ENGINE, blocker=None, images=None):
+    if engine == "fast":
+        handled, job = process_article_fast(url, ledger)
+        if handled:
+            return job
+
+    logging.info(f"[NAVIGATE] {url} (tab)")
+    trace = ArticleTrace(url, tab.send)
+    try:
+        if blocker:
+            blocker.apply_tab(tab, url)
+        with trace.span("get"):
+            tab.navigate(url)
+        site = profile_for(url)
+        with trace.span("act_human", site=site.name, scroll=site.scroll):
+            if site.scroll:
+                scroll_through(tab)
+            else:
+                tab.call(EAGER_IMAGES_JS)
+        with trace.span("ready"):
+            tab.call_async(SETTLE_JS, READY_TIMEOUT * 1000, False, timeout=READY_TIMEOUT + 5)
+
+        with trace.span("metadata"):
+            section, title, author, timestamp = metadata_from_fields(tab.call(EXTRACT_FIELDS_JS, site.metadata))
+        text = tab.call(ARTICLE_TEXT_JS, site.content_root) if fingerprints else None
+        skipped, fp = skip_if_duplicate(ledger, url, title, text)
+        if skipped:
+            trace.outcome = "duplicate"
+            return None
+        cleanup_mode = site.cleanup_mode or CLEANUP_MODE
+        with trace.span("cleanup") as span:
+            cleaned = run_cleanup_in_tab(tab, cleanup_mode, site.remove, site.content_roots())
+            if cleaned:
+                span["removed"] = cleaned["counts"]["removed"]
+
+        metadata = (section, title, author, timestamp)
+        if format_for(site) == "epub":
+            from epub_output import CONTENT_JS
+            job = Rendered(url, metadata, fp, trace, "epub", tab.call(CONTENT_JS, site.content_root))
+        else:
+            output_path = build_output_path(*metadata)
+            job = Rendered(url, metadata, fp, trace, "pdf", None, print_page(tab.send, output_path, trace))
+            job.output_path = output_path
+        job.snapshot, job.cleanup_mode = take_snapshot(tab.send, trace), cleanup_mode
+        if blocker:
+            blocker.page_summary(url)
+        if images:
+            images.page_summary(url)
+        trace.outcome = "rendered"
+        return hand_off(job)
+    finally:
+        trace.finish()
+
+def next_url(url_queue, deferred, limiter, finished):
+    # Returns the next URL whose domain has a token, keeping throttled ones aside
+    # so this worker can serve other domains meanwhile. None means the queue is done.
+    while True:
+        if deferred and deferred[0][0] <= time.monotonic():
+            _, _, url = heapq.heappop(deferred)
+        elif finished and not deferred:
+            return None
+        else:
+            timeout = max(0.0, deferred[0][0] - time.monotonic()) if deferred else None
+            if finished or len(deferred) >= MAX_DEFERRED:
+                time.sleep(timeout)
+                continue
+            try:
+                url = url_queue.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            url_queue.task_done()
+            if url is None:
+                finished = True
+                continue
+
+        wait = limiter.try_acquire(domain_of(url))
+        if wait <= 0:
+            return url, finished
+        heapq.heappush(deferred, (time.monotonic() + wait, next(defer_seq), url))
+
+def attach_images(driver, images=None):
+    # (Re)attaches image transcoding to a worker's driver, e.g. after the supervisor replaced it
+    if images:
+        images.close()
+    return image_transcoder.attach_driver(driver) if image_transcoder else None
+
+def worker_loop(worker_id, supervisor, url_queue, ledger, engine, limiter, blocker):
+    deferred = []  # heap of (ready_at, seq, url)
+    finished = False
+    images = attach_images(supervisor.driver)
+    try:
+        while True:
+            item = next_url(url_queue, deferred, limiter, finished)
+            if item is None:
+                break
+            url, finished = item
+            retry, job = False, None
+            restarts = supervisor.restarts
+            # Worker 0 drives the listing browser, which --poll discovery also uses
+            with listing_lock if worker_id == 0 else contextlib.nullcontext():
+                try:
+                    with browser_stage.working():
+                        job = process_article(supervisor.driver, url, ledger, engine, blocker, images)
+                except Exception as e:
+                    logging.error(f"[ERROR] Could not process {url}: {e}")
+                    retry = supervisor.recover(url, e)  # restarts a dead browser
+                finally:
+                    if supervisor.restarts == restarts:
+                        supervisor.after_page()  # recycles on page count or memory
+                    if retry:
+                        logging.warning(f"[SUPERVISOR] Requeued {url}")
+                        heapq.heappush(deferred, (time.monotonic(), next(defer_seq), url))
+                    elif job is None:  # handed-off articles finish in the pipeline
+                        article_done(url)
+            if supervisor.restarts != restarts:
+                images = attach_images(supervisor.driver, images)
+    finally:
+        if images:
+            images.close()
+        supervisor.quit()
+
+def tab_worker_loop(tab_id, browser, url_queue, ledger, engine, limiter, blocker, in_flight):
+    deferred = []
+    finished = False
+    tab, images, generation = None, None, None
+    try:
+        while True:
+            item = next_url(url_queue, deferred, limiter, finished)
+            if item is None:
+                break
+            url, finished = item
+            current = browser.enter()
+            if current != generation:  # first article, or the shared browser was replaced
+                close_tab(tab, images)
+                tab, images, generation = None, None, current
+            job, restart, retry = None, None, False
+            try:
+                if tab is None:
+                    tab = Tab(browser.conn)
+                    images = image_transcoder.attach_tab(tab) if image_transcoder else None
+                in_flight.add(tab)
+                with browser_stage.working():
+                    job = process_article_in_tab(tab, url, ledger, engine, blocker, images)
+                log_tab_memory(browser.supervisor.driver, list(in_flight))
+                restart = browser.supervisor.worn_out()  # recycles on page count or memory
+            except Exception as e:
+                logging.error(f"[ERROR] Could not process {url} in tab {tab_id}: {e}")
+                if browser.supervisor.died(e):
+                    retry = browser.supervisor.may_retry(url)
+                    restart = f"session died on {url}: {type(e).__name__}"
+            finally:
+                in_flight.discard(tab)
+                browser.leave(restart)  # the last tab out restarts the browser
+                if retry:
+                    logging.warning(f"[SUPERVISOR] Requeued {url}")
+                    heapq.heappush(deferred, (time.monotonic(), next(defer_seq), url))
+                elif job is None:
+                    article_done(url)
+    finally:
+        close_tab(tab, images)
+
+def close_tab(tab, images):
+    # Best effort: after a restart the old connection is already gone
+    try:
+        if images:
+            images.close()
+        if tab:
+            tab.close()
+    except Exception as e:
+        logging.debug(f"[TABS] Closing a tab failed: {e}")
+
+def start_tabs(tabs, listing, url_queue, ledger, engine, limiter, blockers):
+    # K tabs in the listing browser: one process, one logged-in profile
+    browser = SharedBrowser(listing, connect_browser, listing_lock)
+    in_flight = set()
+    threads = []
+    for i in range(tabs):
+        t = threading.Thread(target=tab_worker_loop,
+                             args=(i, browser, url_queue, ledger, engine, limiter, blockers[i], in_flight),
+                             name=f"scribe-tab-{i}", daemon=True)
+        t.start()
+        threads.append(t)
+    return browser, threads
+
+def start_worker(worker_id, url_queue, ledger, engine, limiter, blocker, supervisor=None):
+    # Worker 0 reuses the listing driver on the real profile; the rest get clones, which
+    # their replacement drivers keep using.
+    if supervisor is None:
+        profile_dir = clone_profile(worker_id, USER_DATA_DIR, PROFILE_NAME)
+        supervisor = DriverSupervisor(lambda: create_driver(profile_dir), f"worker-{worker_id}")
+    t = threading.Thread(target=worker_loop,
+                         args=(worker_id, supervisor, url_queue, ledger, engine, limiter, blocker),
+                         name=f"scribe-worker-{worker_id}", daemon=True)
+    t.start()
+    return t
+
+def feed_queue(url_queue, entries, ledger):
+    # The bounded queue blocks here, so only a few URLs are ever held in memory
+    for position, url in entries:
+        if url in ledger:
+            logging.info(f"[SKIP] Already downloaded: {url}")
+            if batch_progress:
+                batch_progress.skip(position)
+            continue
+        if batch_progress:
+            batch_progress.submit(position, url)
+        url_queue.put(url)
+
+def main(workers=WORKERS, engine=ENGINE, profile=None, tabs=TABS, block=True,
+         optimize=OPTIMIZE_PDFS, grayscale=False, dedup=DEDUP, batch=None, checkpoint=CHECKPOINT_FILE,
+         poll=None, fmt=OUTPUT_FORMAT, transcode_images=TRANSCODE_IMAGES, deliver=None, snapshots=SNAPSHOTS):
+    global post_processor, fingerprints, batch_progress, output_format, grayscale_images, image_transcoder
+    global delivery, snapshot_archive, discovery
+    profile = profile or StartupProfile()
+    profile.mark("imports")
+    open_metrics(setup_logging())
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    ledger = open_ledger(LEDGER_FILE, TRACK_FILE)
+    output_format, grayscale_images = fmt, grayscale
+    if dedup:
+        fingerprints = FingerprintIndex(LEDGER_FILE)
+    if optimize:
+        from pdf_optimize import PostProcessor
+        post_processor = PostProcessor(grayscale=grayscale)
+    if transcode_images:
+        from image_transcode import ImageTranscoder
+        image_transcoder = ImageTranscoder(grayscale=grayscale)
+    if deliver:
+        from delivery import TabletDelivery
+        delivery = TabletDelivery(deliver, LEDGER_FILE)
+        delivery.resume()
+    if snapshots:
+        snapshot_archive = SnapshotArchive(LEDGER_FILE)
+    profile.mark("logging + ledger")
+    listing = DriverSupervisor(create_driver, "worker-0")
+    profile.mark("driver launch")
+
+    if batch:
+        batch_progress = BatchProgress(batch, checkpoint)
+        entries = batch_progress.entries()
+        slots = tabs if tabs > 0 else workers
+        described = f"Streaming {', '.join(batch)}"
+        profile.report()
+    else:
+        site = get_profile(LISTING_SITE)
+        discovery = ListingDiscovery(LEDGER_FILE)
+        pending = discovery.discover(listing.driver, site, ledger)  # already excludes downloaded articles
+        profile.mark("listing")
+        profile.report()
+        if poll:
+            fresh = discovery.poll(lambda: listing.driver, site, ledger, poll, listing_lock)
+            entries = enumerate(itertools.chain(pending, fresh))
+            slots = tabs if tabs > 0 else workers
+            described = f"{len(pending)} articles, then polling every {poll:g} min,"
+        else:
+            entries = enumerate(pending)
+            slots = (min(tabs, len(pending)) or 1) if tabs > 0 else (min(workers, len(pending)) or 1)
+            described = f"{len(pending)} articles"
+    limiter = DomainRateLimiter(DOMAIN_RATE)
+    shared = None
+    # One blocker per worker/tab so per-article counts don't mix
+    blockers = [RequestBlocker(BLOCK_CATEGORIES, SITE_ALLOW) if block else None for _ in range(slots)]
+    url_queue = queue.Queue(maxsize=slots * 2)
+    build_pipeline(ledger, slots, url_queue)
+    if tabs > 0:
+        logging.info(f"[TABS] {described} across {slots} tab(s) in one browser")
+        shared, threads = start_tabs(slots, listing, url_queue, ledger, engine, limiter, blockers)
+    else:
+        logging.info(f"[POOL] {described} across {slots} worker(s)")
+        threads = [start_worker(0, url_queue, ledger, engine, limiter, blockers[0], listing)]
+        threads += [start_worker(i, url_queue, ledger, engine, limiter, blockers[i]) for i in range(1, slots)]
 
-    driver.quit()
+    try:
+        feed_queue(url_queue, entries, ledger)
+        for _ in threads:
+            url_queue.put(None)
+        for t in threads:
+            t.join()
+        pipeline.close()  # writes and records what the browsers handed over
+    except KeyboardInterrupt:
+        if batch_progress:
+            batch_progress.close(completed=False)  # resume from the oldest article still in flight
+        raise
+    if shared is not None:
+        shared.close()
+    if block:
+        log_run_total(blockers)
+    if image_transcoder:
+        image_transcoder.summary()
+        image_transcoder.close()
+    if post_processor:
+        post_processor.close()  # waits for the last optimizations
+    if delivery:
+        delivery.close()  # waits for the last uploads; failures stay pending for the next run
+    if fingerprints:
+        fingerprints.summary()
+        fingerprints.close()
+    if snapshot_archive:
+        snapshot_archive.close()
+    if batch_progress:
+        batch_progress.close(completed=True)
+    else:
+        discovery.settle(ledger)  # saves the listing state once this run has tried all its links
+        discovery.close()
+
+    ledger.close()
+    close_metrics()
     logging.info("=== Script End ===")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Download the latest Atlantic articles as reMarkable PDFs.")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="number of parallel Chrome drivers, each with its own profile copy")
+    parser.add_argument("--tabs", type=int, default=TABS,
+                        help="render this many tabs concurrently inside one Chrome (instead of --workers)")
+    parser.add_argument("--engine", choices=("selenium", "fast"), default=ENGINE,
+                        help="'fast' renders static pages without a browser and falls back to Chrome")
+    parser.add_argument("--no-block", action="store_true",
+                        help="let ads, trackers, video and web fonts load")
+    parser.add_argument("--optimize", action="store_true", default=OPTIMIZE_PDFS,
+                        help="downsample images and subset fonts in a background process pool")
+    parser.add_argument("--grayscale", action="store_true",
+                        help="with --optimize, --transcode-images or --format epub, convert images to grayscale")
+    parser.add_argument("--transcode-images", action="store_true", default=TRANSCODE_IMAGES,
+                        help="resize and recompress images while pages load, caching them on disk across articles")
+    parser.add_argument("--format", choices=("pdf", "epub"), default=OUTPUT_FORMAT,
+                        help="'epub' writes reflowable books from the cleaned page instead of printing PDFs")
+    parser.add_argument("--deliver", nargs="?", const=DELIVERY_URL, metavar="URL",
+                        help="upload each finished file to the tablet's USB web interface as soon as it is "
+                             f"written (default {DELIVERY_URL})")
+    parser.add_argument("--snapshots", action="store_true", default=SNAPSHOTS,
+                        help="archive each cleaned page as MHTML; 'python snapshots.py rerender' rebuilds PDFs from it")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="render even when the article text matches one already downloaded")
+    parser.add_argument("--batch", nargs="+", metavar="SOURCE",
+                        help="render URLs from list files, RSS/Atom feed files or '-' for stdin "
+                             "instead of the Atlantic listing")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE,
+                        help="where --batch records its position so an interrupted run resumes")
+    parser.add_argument("--poll", type=float, metavar="MINUTES",
+                        help="keep running and check the listing for new articles every MINUTES")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print how long each cold-start phase took")
+    args = parser.parse_args()
+    main(args.workers, args.engine, StartupProfile(args.startup_profile), args.tabs, not args.no_block,
+         args.optimize, args.grayscale, not args.no_dedup, args.batch, args.checkpoint,
+         args.poll, args.format, args.transcode_images, args.deliver, args.snapshots)
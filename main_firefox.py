@@ -1,16 +1,20 @@
+from startup import StartupProfile
 import os
+import sys
 import time
 import json
-import base64
-import random
+import logging
+import argparse
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.action_chains import ActionChains
-from webdriver_manager.firefox import GeckoDriverManager
-import subprocess
+from batch import CHECKPOINT_FILE, BatchProgress
+from cleanup import run_cleanup
+from driver_cache import launch_driver
+from ledger import LEDGER_FILE, open_ledger
+from pacing import DomainRateLimiter, domain_of, wait_for_assets, wait_for_dom
+from pdf_capture import PDF_PRINT_OPTIONS, print_page_to_file
+from site_profiles import profile_for
+from supervisor import DriverSupervisor
+# Selenium and webdriver_manager are imported where they are used to keep startup fast
 
 # ---- Load config ----
 with open("config.json", "r") as f:
@@ -20,18 +24,27 @@ OUTPUT_DIR = CONFIG["output_dir"]
 USER_DATA_DIR = CONFIG["user_data_dir"]
 PROFILE_NAME = CONFIG["profile_name"]
 CLEANUP_MODE = CONFIG.get("cleanup_mode", "gentle")
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+HEADLESS = CONFIG.get("firefox_headless", True)  # printing no longer needs a window
+DOMAIN_RATE = 6  # article loads per minute per domain in --batch runs, as in main.py
 
 def sanitize_filename(name):
     name = name.replace(":", "-").replace("/", "-").replace("?", "")
     return "".join(c for c in name if c.isalnum() or c in (" ", "-", "_")).strip()
 
-def create_driver():
+def resolve_geckodriver():
+    from webdriver_manager.firefox import GeckoDriverManager
+    return GeckoDriverManager().install()
+
+def create_driver(headless=HEADLESS):
+    from selenium import webdriver
+    from selenium.webdriver.firefox.options import Options as FirefoxOptions
+    from selenium.webdriver.firefox.service import Service as FirefoxService
+
     opts = FirefoxOptions()
     opts.add_argument("--width=1280")
     opts.add_argument("--height=800")
-    # opts.add_argument("--headless")  # Optional
+    if headless:
+        opts.add_argument("--headless")
 
     # Load profile if needed
     profile_path = os.path.join(USER_DATA_DIR, PROFILE_NAME)
@@ -43,139 +56,12 @@ def create_driver():
     if extension_path and os.path.exists(extension_path):
         profile = webdriver.FirefoxProfile()
         profile.add_extension(extension=extension_path)
-        service = FirefoxService(executable_path=GeckoDriverManager().install())
-        return webdriver.Firefox(service=service, options=opts, firefox_profile=profile)
+        return launch_driver("geckodriver", resolve_geckodriver, lambda path: webdriver.Firefox(
+            service=FirefoxService(executable_path=path), options=opts, firefox_profile=profile))
 
     # No extension case
-    service = FirefoxService(executable_path=GeckoDriverManager().install())
-    return webdriver.Firefox(service=service, options=opts)
-
-def gentle_cleanup(driver):
-    js = """
-        const style = document.createElement('style');
-        style.innerHTML = `
-            body {
-                font-family: Georgia, serif;
-                line-height: 1.6;
-            }
-            img, iframe, video {
-                max-width: 100%;
-                height: auto;
-            }
-            .caption, figcaption, [class*='caption'] {
-                display: block;
-                font-size: 0.9em;
-                color: #555;
-                text-align: center;
-                margin-top: 0.3em;
-            }
-        `;
-        document.head.appendChild(style);
-
-        const selectors = [
-            '[class*="popup"]', '[id*="popup"]',
-            '[class*="overlay"]', '[id*="overlay"]',
-            '[class*="modal"]', '[id*="modal"]',
-            '[class*="cookie"]', '[id*="cookie"]',
-            '[class*="subscribe"]', '[id*="subscribe"]'
-        ];
-        selectors.forEach(sel => {
-            document.querySelectorAll(sel).forEach(el => el.remove());
-        });
-
-        document.body.style.overflow = 'auto';
-    """
-    driver.execute_script(js)
-
-def isolate_main_content(driver):
-    js = """
-        function zap(selectors) {
-            selectors.forEach(sel => {
-                document.querySelectorAll(sel).forEach(el => el.remove());
-            });
-        }
-
-        zap([
-            'header', 'footer', 'nav', 'aside',
-            '[class*="sidebar"]', '[id*="sidebar"]',
-            '[class*="popup"]', '[id*="popup"]',
-            '[class*="overlay"]', '[id*="overlay"]',
-            '[class*="modal"]', '[id*="modal"]',
-            '[class*="ad"]', '[id*="ad"]',
-            '[class*="cookie"]', '[id*="cookie"]',
-            '[class*="banner"]', '[id*="banner"]',
-            '[class*="StickyVideo"]', '[id*="StickyVideo"]',
-            '[class*="VideoHub"]', '[id*="VideoHub"]',
-            'iframe[src*="video"]', 'iframe[src*="youtube"]',
-            'video', 'figure[class*="video"]', 'div[class*="video"]'
-        ]);
-
-        let main = document.querySelector("main") ||
-                   document.querySelector('[role="main"]') ||
-                   document.querySelector('[class*="article"]') ||
-                   document.querySelector('[class*="story"]') ||
-                   document.querySelector('[class*="content"]');
-
-        if (main) {
-            document.body.innerHTML = "";
-            document.body.appendChild(main.cloneNode(true));
-            document.body.style.margin = "2em";
-            document.body.style.fontFamily = "Georgia, serif";
-            document.body.style.lineHeight = "1.6";
-            document.body.style.background = "white";
-        } else {
-            console.warn("[WARN] No main content found.");
-        }
-
-        document.querySelectorAll("*").forEach(el => {
-            const style = window.getComputedStyle(el);
-            if (["fixed", "sticky"].includes(style.position)) {
-                el.style.display = "none";
-            }
-        });
-    """
-    driver.execute_script(js)
-
-def fix_layout(driver):
-    js = '''
-        const style = document.createElement('style');
-        style.innerHTML = `
-            * {
-                box-sizing: border-box !important;
-                max-width: 100% !important;
-                word-wrap: break-word !important;
-            }
-
-            body {
-                margin: 0 auto;
-                padding: 2em;
-                font-family: Georgia, serif;
-                font-size: 16px;
-                line-height: 1.6;
-                background: white;
-                max-width: 700px;
-            }
-
-            img, video, iframe {
-                max-width: 100% !important;
-                height: auto !important;
-            }
-
-            figure {
-                margin-bottom: 1.5em;
-            }
-
-            figcaption, .caption, [class*="caption"] {
-                display: block;
-                font-size: 0.9em;
-                color: #555;
-                margin-top: 0.3em;
-                text-align: center;
-            }
-        `;
-        document.head.appendChild(style);
-    '''
-    driver.execute_script(js)
+    return launch_driver("geckodriver", resolve_geckodriver, lambda path: webdriver.Firefox(
+        service=FirefoxService(executable_path=path), options=opts))
 
 def clear_console():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -184,9 +70,68 @@ def print_welcome():
     print("Welcome to RemarkablePageScribe! Enter a URL to save as a ReMarkable PDF.")
     print("Type 'q' or 'quit' to exit.\n")
 
-def main():
-    driver = create_driver()
-
+def save_page_as_pdf(driver, output_path):
+    # WebDriver Print with the same page geometry Chrome's printToPDF uses
+    print_page_to_file(driver, output_path, PDF_PRINT_OPTIONS)
+
+def process_url(driver, url, report=print):
+    # Returns (title, filepath). Firefox has no DevTools network log, so readiness is
+    # DOMContentLoaded plus the in-page image/font check.
+    report(f"[OPENING] {url}")
+    driver.get(url)
+    wait_for_dom(driver)
+    wait_for_assets(driver)
+
+    title = driver.title or "webpage"
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    filename = sanitize_filename(f"{timestamp}_{title}") + ".pdf"
+    filepath = os.path.join(OUTPUT_DIR, filename)
+
+    site = profile_for(url)
+    run_cleanup(driver, site.cleanup_mode or CLEANUP_MODE, site.remove, site.content_roots(), report=report)
+
+    report(f"[SAVING PDF] → {filepath}")
+    save_page_as_pdf(driver, filepath)
+    return title, filepath
+
+def render(browser, url, ledger, report=print):
+    # One article with crash recovery; the browser is replaced and the URL tried again once
+    started = time.monotonic()
+    try:
+        title, filepath = process_url(browser.driver, url, report)
+    except Exception as e:
+        if not browser.recover(url, e):
+            raise
+        report("[RETRY] Firefox had crashed; trying again with a fresh one")
+        title, filepath = process_url(browser.driver, url, report)
+    ledger.record(url, title=title, output_path=filepath, render_ms=int((time.monotonic() - started) * 1000))
+    browser.after_page()
+    return filepath
+
+def run_batch(browser, ledger, sources, checkpoint=CHECKPOINT_FILE):
+    # Unattended: the same sources, checkpoint and ledger skipping as main.py --batch
+    progress = BatchProgress(sources, checkpoint)
+    limiter = DomainRateLimiter(DOMAIN_RATE)
+    try:
+        for position, url in progress.entries():
+            if url in ledger:
+                logging.info(f"[SKIP] Already downloaded: {url}")
+                progress.skip(position)
+                continue
+            progress.submit(position, url)
+            try:
+                limiter.acquire(domain_of(url))
+                render(browser, url, ledger, report=logging.info)
+            except Exception as e:
+                logging.error(f"[ERROR] Could not process {url}: {e}")
+            # Not in a finally: an interrupted article stays in flight, so the checkpoint keeps it
+            progress.finish(url)
+    except KeyboardInterrupt:
+        progress.close(completed=False)  # resume from the article that was in flight
+        raise
+    progress.close(completed=True)
+
+def run_interactive(browser, ledger):
     while True:
         clear_console()
         print_welcome()
@@ -194,38 +139,43 @@ def main():
         if url.lower() in {"q", "quit"}:
             break
         try:
-            print(f"[OPENING] {url}")
-            driver.get(url)
-
-            title = driver.title or "webpage"
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-            filename = sanitize_filename(f"{timestamp}_{title}") + ".pdf"
-            filepath = os.path.join(OUTPUT_DIR, filename)
-
-            print(f"[SAVING PDF] → {filepath}")
-
-            if CLEANUP_MODE == "aggressive":
-                print("[DEBUG] Using aggressive cleanup...")
-                isolate_main_content(driver)
-                print("[DEBUG] Isolated main content")
-                fix_layout(driver)
-                print("[DEBUG] Applied fix_layout")
-            else:
-                print("[DEBUG] Using gentle cleanup...")
-                gentle_cleanup(driver)
-
-            # Firefox workaround: Use print dialog to save PDF or use pyautogui to automate
-            print("[INFO] Please manually print the page to PDF using Firefox's print dialog.")
-            input("Press Enter after saving the PDF...")
-
+            render(browser, url, ledger)
             print("[DONE]\n")
             time.sleep(2)
 
         except Exception as e:
             print(f"[ERROR] Failed to process: {e}\n")
 
-    driver.quit()
+def main(profile=None, batch=None, checkpoint=CHECKPOINT_FILE, headless=HEADLESS):
+    profile = profile or StartupProfile()
+    profile.mark("imports + config")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    ledger = open_ledger(LEDGER_FILE)
+    # Replaces Firefox when it dies or grows too large over a long batch
+    browser = DriverSupervisor(lambda: create_driver(headless), "firefox", report=logging.info)
+    profile.mark("driver launch")
+    profile.report()
+
+    try:
+        if batch:
+            run_batch(browser, ledger, batch, checkpoint)
+        else:
+            run_interactive(browser, ledger)
+    finally:
+        browser.quit()
+        ledger.close()
     print("Goodbye!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Save web pages as reMarkable PDFs with Firefox.")
+    parser.add_argument("--batch", nargs="+", metavar="SOURCE",
+                        help="render URLs from list files, RSS/Atom feed files or '-' for stdin, unattended")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE,
+                        help="where --batch records its position so an interrupted run resumes")
+    parser.add_argument("--show", action="store_true", help="open a visible Firefox window")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print how long each cold-start phase took")
+    args = parser.parse_args()
+    main(StartupProfile(args.startup_profile), args.batch, args.checkpoint, HEADLESS and not args.show)
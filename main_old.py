@@ -1,16 +1,19 @@
+from startup import StartupProfile
 import os
+import sys
 import time
 import json
-import base64
 import random
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.action_chains import ActionChains
-from webdriver_manager.chrome import ChromeDriverManager
 import subprocess
+from blocking import RequestBlocker
+from cleanup import run_cleanup
+from driver_cache import launch_driver
+from pacing import reset_network_log
+from pdf_capture import PDF_PRINT_OPTIONS, stream_pdf_to_file
+from site_profiles import profile_for
+from supervisor import DriverSupervisor
+# Selenium and webdriver_manager are imported where they are used to keep startup fast
 
 # ---- Load config ----
 with open("config.json", "r") as f:
@@ -26,38 +29,71 @@ OUTPUT_DIR = CONFIG["output_dir"]
 USER_DATA_DIR = CONFIG["user_data_dir"]
 PROFILE_NAME = CONFIG["profile_name"]
 
-# Make output directory if it doesn't exist.
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Requests Chrome never fetches: any of "ads", "analytics", "video", "fonts".
+# block_allow lets categories or URL patterns through per site, e.g. {"nytimes.com": ["fonts"]}
+BLOCK_CATEGORIES = CONFIG.get("block_categories", ["ads", "analytics", "video", "fonts"])
+BLOCK_ALLOW = CONFIG.get("block_allow", {})
+
+# Page cleanup before printing: "aggressive" isolates the article, "gentle" only drops overlays, "none" prints as is
+CLEANUP_MODE = "aggressive"  # as before cleanup_mode existed; config.json's cleanup_mode is for main_firefox.py
+
 
 
 def sanitize_filename(name):
     name = name.replace(":", "-").replace("/", "-").replace("?", "")
     return "".join(c for c in name if c.isalnum() or c in (" ", "-", "_")).strip()
 
+def unique_path(filepath):
+    # Names only have minute resolution, so a second save of the same title gets " 2", " 3", ...
+    base, ext = os.path.splitext(filepath)
+    n = 2
+    while os.path.exists(filepath):
+        filepath = f"{base} {n}{ext}"
+        n += 1
+    return filepath
+
+
+
+
 
+def resolve_chromedriver():
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
 
 
+def create_driver(user_data_dir=USER_DATA_DIR):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
 
-def create_driver():
     opts = Options()
     opts.add_argument("--start-maximized")
-    opts.add_argument(f"--user-data-dir={USER_DATA_DIR}")
+    opts.add_argument(f"--user-data-dir={user_data_dir}")
     opts.add_argument(f"--profile-directory={PROFILE_NAME}")
     opts.add_argument("--disable-blink-features=AutomationControlled")
     opts.add_argument("--headless=new")
     opts.add_argument("--log-level=3")
     opts.add_argument("--disable-logging")
     opts.add_argument("--disable-gpu")
+    opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})  # feeds the block counters
 
-    service = Service(ChromeDriverManager().install())
-    service.log_output = subprocess.DEVNULL  # Only suppress ChromeDriver logs
+    def start(path):
+        service = Service(path)
+        service.log_output = subprocess.DEVNULL  # Only suppress ChromeDriver logs
+        return webdriver.Chrome(service=service, options=opts)
 
-    return webdriver.Chrome(service=service, options=opts)
+    # The driver path is cached, so only the first launch asks ChromeDriverManager (network)
+    return launch_driver("chromedriver", resolve_chromedriver, start)
 
 
 
 
 def create_driverv1():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+
     opts = Options()
     opts.add_argument("--start-maximized")
     opts.add_argument(f"--user-data-dir={USER_DATA_DIR}")
@@ -69,6 +105,9 @@ def create_driverv1():
 
 
 def act_human(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.action_chains import ActionChains
+
     height = driver.execute_script("return document.body.scrollHeight")
     for pos in range(0, height, random.randint(300, 800)):
         driver.execute_script(f"window.scrollTo(0, {pos});")
@@ -81,175 +120,9 @@ def act_human(driver):
         except:
             pass
 
-def remove_popups(driver):
-    js_cleanup = """
-        // Remove common overlays and modals
-        const selectors = [
-            '[id*="popup"]',
-            '[class*="popup"]',
-            '[id*="overlay"]',
-            '[class*="overlay"]',
-            '[class*="modal"]',
-            '[id*="modal"]',
-            '[class*="newsletter"]',
-            '[id*="subscribe"]',
-            '[class*="subscribe"]',
-            '[id*="cookie"]',
-            '[class*="cookie"]'
-        ];
-        for (let sel of selectors) {
-            document.querySelectorAll(sel).forEach(el => el.remove());
-        }
-
-        // Prevent scrolling lock (common on modals)
-        document.body.style.overflow = 'auto';
-    """
-    driver.execute_script(js_cleanup)
-
-
-
-def fix_layout(driver):
-    css_fix = '''
-        const style = document.createElement('style');
-        style.innerHTML = `
-            * {
-                box-sizing: border-box !important;
-                max-width: 100% !important;
-                word-wrap: break-word !important;
-            }
-
-            body {
-                margin: 0 auto;
-                padding: 2em;
-                font-family: Georgia, serif;
-                font-size: 16px;
-                line-height: 1.6;
-                background: white;
-                max-width: 700px;
-            }
-
-            img, video, iframe {
-                max-width: 100% !important;
-                height: auto !important;
-            }
-
-            figure {
-                margin-bottom: 1.5em;
-            }
-
-            figcaption, .caption, [class*="caption"], .MediaCaption__text {
-                display: block;
-                font-size: 0.9em;
-                color: #555;
-                margin-top: 0.3em;
-                text-align: center;
-            }
-        `;
-        document.head.appendChild(style);
-    '''
-    driver.execute_script(css_fix)
-
-
-
-def fix_layoutv1(driver):
-    css_fix = '''
-        const style = document.createElement('style');
-        style.innerHTML = `
-            * {
-                box-sizing: border-box !important;
-                max-width: 100% !important;
-                word-wrap: break-word !important;
-            }
-
-            body {
-                margin: 0 auto;
-                padding: 2em;
-                font-family: Georgia, serif;
-                font-size: 16px;
-                line-height: 1.6;
-                background: white;
-                max-width: 700px;
-            }
-
-            img, video, iframe {
-                max-width: 100% !important;
-                height: auto !important;
-            }
-        `;
-        document.head.appendChild(style);
-    '''
-    driver.execute_script(css_fix)
-
-
-
-def isolate_main_content(driver):
-    js_ap_hardcore_cleanup = """
-        // Helper to remove elements by selector
-        function zap(selectors) {
-            selectors.forEach(sel => {
-                document.querySelectorAll(sel).forEach(el => el.remove());
-            });
-        }
-
-        // Remove common clutter
-        zap([
-            'header', 'footer', 'nav', 'aside',
-            '[class*="sidebar"]', '[id*="sidebar"]',
-            '[class*="popup"]', '[id*="popup"]',
-            '[class*="overlay"]', '[id*="overlay"]',
-            '[class*="modal"]', '[id*="modal"]',
-            '[class*="ad"]', '[id*="ad"]',
-            '[class*="cookie"]', '[id*="cookie"]',
-            '[class*="banner"]', '[id*="banner"]',
-            '[class*="StickyVideo"]', '[id*="StickyVideo"]',
-            '[class*="VideoHub"]', '[id*="VideoHub"]',
-            'iframe[src*="video"]', 'iframe[src*="youtube"]',
-            'video', 'figure[class*="video"]', 'div[class*="video"]'
-        ]);
-
-        // Try to isolate main content
-        let main = document.querySelector("main") ||
-                   document.querySelector('[role="main"]') ||
-                   document.querySelector('[class*="article"]') ||
-                   document.querySelector('[class*="story"]') ||
-                   document.querySelector('[class*="content"]');
-
-        if (main) {
-            document.body.innerHTML = "";
-            document.body.appendChild(main.cloneNode(true));
-            document.body.style.margin = "2em";
-            document.body.style.fontFamily = "Georgia, serif";
-            document.body.style.lineHeight = "1.6";
-            document.body.style.background = "white";
-        }
-
-        // As a final punch: hide any floating/fixed elements
-        document.querySelectorAll("*").forEach(el => {
-            const style = window.getComputedStyle(el);
-            if (["fixed", "sticky"].includes(style.position)) {
-                el.style.display = "none";
-            }
-        });
-    """
-    driver.execute_script(js_ap_hardcore_cleanup)
-
-
-
-
 def save_page_as_pdf(driver, output_path):
     #time.sleep(2)
-    pdf_data = driver.execute_cdp_cmd("Page.printToPDF", {
-        "printBackground": True,
-        "paperWidth": 5.8,
-        "paperHeight": 8.3,
-        "marginTop": 0.4,
-        "marginBottom": 0.4,
-        "marginLeft": 0.4,
-        "marginRight": 0.4,
-        "scale": 0.9,
-    })["data"]
-    with open(output_path, "wb") as f:
-        f.write(base64.b64decode(pdf_data))
+    stream_pdf_to_file(driver, output_path, PDF_PRINT_OPTIONS)
 
 
 def clear_console():
@@ -264,8 +137,44 @@ def print_welcome():
 
 
 
-def main():
-    driver = create_driver()
+def create_blocker():
+    return RequestBlocker(BLOCK_CATEGORIES, BLOCK_ALLOW) if BLOCK_CATEGORIES else None
+
+
+def process_url(driver, url, report=print, blocker=None, tag=None):
+    # Returns (title, filepath); `tag` (the daemon's job id) keeps concurrent jobs' names apart
+    report(f"[OPENING] {url}")
+    if blocker:
+        reset_network_log(driver)
+        blocker.apply(driver, url)
+    driver.get(url)
+    #act_human(driver)
+
+    title = driver.title or "webpage"
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    filename = sanitize_filename(f"{timestamp}_{title}" + (f"_{tag}" if tag else "")) + ".pdf"
+    filepath = unique_path(os.path.join(OUTPUT_DIR, filename))
+
+    report(f"[SAVING PDF] → {filepath}")
+    site = profile_for(url)
+    run_cleanup(driver, site.cleanup_mode or CLEANUP_MODE, site.remove, site.content_roots(), report=report)
+    save_page_as_pdf(driver, filepath)
+    if blocker:
+        reset_network_log(driver)
+        report(f"[BLOCKED] {blocker.describe(blocker.page_summary(url))}")
+    return title, filepath
+
+
+def main(profile=None):
+    profile = profile or StartupProfile()
+    profile.mark("imports + config")
+    # Make output directory if it doesn't exist.
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    # Replaces the browser when it dies or grows too large over a long session
+    browser = DriverSupervisor(create_driver, "browser", report=print)
+    blocker = create_blocker()
+    profile.mark("driver launch")
+    profile.report()
 
     while True:
         # Clear console.
@@ -278,20 +187,14 @@ def main():
         if url.lower() in {"q", "quit"}:
             break
         try:
-            print(f"[OPENING] {url}")
-            driver.get(url)
-            #act_human(driver)
-
-            title = driver.title or "webpage"
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-            filename = sanitize_filename(f"{timestamp}_{title}") + ".pdf"
-            filepath = os.path.join(OUTPUT_DIR, filename)
-
-            print(f"[SAVING PDF] → {filepath}")
-            #remove_popups(driver)
-            isolate_main_content(driver)
-            fix_layout(driver)
-            save_page_as_pdf(driver, filepath)
+            try:
+                process_url(browser.driver, url, blocker=blocker)
+            except Exception as e:
+                if not browser.recover(url, e):
+                    raise
+                print("[RETRY] The browser had crashed; trying again with a fresh one")
+                process_url(browser.driver, url, blocker=blocker)
+            browser.after_page()
 
             print("[DONE]\n")
 
@@ -300,9 +203,9 @@ def main():
         except Exception as e:
             print(f"[ERROR] Failed to process: {e}\n")
 
-    driver.quit()
+    browser.quit()
     print("Goodbye!")
 
 
 if __name__ == "__main__":
-    main()
+    main(StartupProfile("--startup-profile" in sys.argv))
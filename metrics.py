@@ -0,0 +1,200 @@
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+
+from pacing import domain_of
+
+# ----- Configuration -----
+METRICS_SUFFIX = ".metrics.jsonl"
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+# Performance.getMetrics names: gauges are reported as read, counters as the delta over one article
+GAUGES   = ("JSHeapUsedSize", "JSHeapTotalSize", "Nodes", "Documents", "Frames", "JSEventListeners")
+COUNTERS = ("LayoutCount", "RecalcStyleCount", "LayoutDuration", "RecalcStyleDuration",
+            "ScriptDuration", "TaskDuration")
+
+
+class MetricsWriter:
+    # Appends one JSON object per line; line-buffered so a crash loses at most the record in flight
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":"), default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+_writer = None
+
+
+def open_metrics(log_file_path):
+    # Metrics sit next to the run log: scraper_<time>.log -> scraper_<time>.metrics.jsonl
+    global _writer
+    _writer = MetricsWriter(os.path.splitext(log_file_path)[0] + METRICS_SUFFIX)
+    logging.info(f"[METRICS] Writing spans to {_writer.path}")
+    return _writer
+
+
+def close_metrics():
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+
+def emit(record):
+    if _writer is not None:
+        _writer.write(record)
+
+
+def browser_metrics(send):
+    # send(method, params) is driver.execute_cdp_cmd or a Tab session; None if the browser can't say
+    try:
+        send("Performance.enable", {})
+        reply = send("Performance.getMetrics", {})
+    except Exception as e:
+        logging.debug(f"[METRICS] Performance.getMetrics unavailable: {e}")
+        return None
+    wanted = set(GAUGES) | set(COUNTERS)
+    return {m["name"]: m["value"] for m in reply.get("metrics", []) if m["name"] in wanted}
+
+
+class ArticleTrace:
+    # Spans for one URL. Each span becomes a line as soon as it ends; finish() adds the
+    # article line with the total and the browser's own numbers.
+    def __init__(self, url, send=None, worker=None):
+        self.url = url
+        self.domain = domain_of(url)
+        self.worker = worker or threading.current_thread().name
+        self.send = send
+        self.started = time.perf_counter()
+        self.outcome = "error"
+        self.before = browser_metrics(send) if send and _writer is not None else None
+
+    def record(self, stage, ms, outcome="ok", **fields):
+        emit({"type": "span", "ts": round(time.time(), 3), "url": self.url, "domain": self.domain,
+              "worker": self.worker, "stage": stage, "ms": round(ms, 1), "outcome": outcome, **fields})
+
+    @contextmanager
+    def span(self, stage, **fields):
+        # Yields a dict the caller can add fields to (bytes, counts, ...)
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield fields
+        except BaseException as e:
+            outcome = "error"
+            fields["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record(stage, (time.perf_counter() - started) * 1000, outcome, **fields)
+
+    def finish(self, outcome=None):
+        outcome = outcome or self.outcome
+        record = {"type": "article", "ts": round(time.time(), 3), "url": self.url, "domain": self.domain,
+                  "worker": self.worker, "ms": round((time.perf_counter() - self.started) * 1000, 1),
+                  "outcome": outcome}
+        after = browser_metrics(self.send) if self.send and _writer is not None else None
+        if after:
+            browser = {name: after[name] for name in GAUGES if name in after}
+            for name in COUNTERS:
+                if name in after:
+                    # A cross-site navigation swaps the renderer and restarts its counters
+                    start = (self.before or {}).get(name, 0)
+                    browser[name] = after[name] - start if after[name] >= start else after[name]
+            record["browser"] = browser
+        emit(record)
+
+
+# ----- Summary -----
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def read_records(paths):
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+
+
+def print_table(title, groups):
+    print(f"\n{title:<24}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}  (ms)")
+    for name, (values, errors) in sorted(groups.items(), key=lambda item: -percentile(item[1][0], 50)):
+        print(f"{name[:23]:<24}{len(values):>6}{percentile(values, 50):>10.0f}{percentile(values, 95):>10.0f}"
+              f"{percentile(values, 99):>10.0f}{errors:>8}")
+
+
+def summarize(paths, by_domain_stage=False):
+    stages, domains, domain_stages = {}, {}, {}
+    browser = {}
+    for record in read_records(paths):
+        failed = record.get("outcome") == "error"
+        if record.get("type") == "span":
+            for groups, key in ((stages, record["stage"]),
+                                (domain_stages, f"{record['domain']} {record['stage']}")):
+                values, errors = groups.setdefault(key, ([], 0))
+                values.append(record["ms"])
+                groups[key] = (values, errors + failed)
+        elif record.get("type") == "article":
+            values, errors = domains.setdefault(record["domain"], ([], 0))
+            values.append(record["ms"])
+            domains[record["domain"]] = (values, errors + failed)
+            for name, value in (record.get("browser") or {}).items():
+                browser.setdefault(name, []).append(value)
+
+    if not stages:
+        print("No spans recorded.")
+        return
+    print_table("stage", stages)
+    print_table("domain (whole article)", domains)
+    if by_domain_stage:
+        print_table("domain + stage", domain_stages)
+    if browser:
+        print(f"\n{'browser metric':<24}{'p50':>14}{'p95':>14}{'p99':>14}")
+        for name, values in sorted(browser.items()):
+            scale, unit = (2**20, " MiB") if name.startswith("JSHeap") else (
+                (0.001, " ms") if name.endswith("Duration") else (1, ""))
+            print(f"{name:<24}" + "".join(f"{percentile(values, p) / scale:>10.1f}{unit:<4}" for p in (50, 95, 99)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize per-stage timings from main.py runs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="p50/p95/p99 per stage and per domain")
+    summary.add_argument("files", nargs="*", help=f"*{METRICS_SUFFIX} files (default: the latest run)")
+    summary.add_argument("--all", action="store_true", help="every run in logs/")
+    summary.add_argument("--by-domain-stage", action="store_true", help="also break stages down per domain")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(LOG_DIR, f"*{METRICS_SUFFIX}")))
+    if not args.files and not args.all:
+        files = files[-1:]
+    if not files:
+        print(f"No metrics files found in {LOG_DIR}")
+        sys.exit(1)
+    print("Runs: " + ", ".join(os.path.basename(path) for path in files))
+    summarize(files, args.by_domain_stage)
+
+
+if __name__ == "__main__":
+    main()
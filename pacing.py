@@ -0,0 +1,199 @@
+import json
+import time
+import random
+import logging
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+# ----- Configuration -----
+# Jitter specs are {"distribution": ..., **params}; see sample_jitter for the supported shapes.
+ARTICLE_JITTER = {"distribution": "uniform", "low": 2.0, "high": 8.0}
+SCROLL_JITTER  = {"distribution": "lognormal", "mu": -2.0, "sigma": 0.6, "max": 0.6}
+READY_TIMEOUT  = 20      # seconds before we give up waiting and print anyway
+NETWORK_IDLE_MS = 500    # how long the network must stay quiet
+NETWORK_IDLE_INFLIGHT = 2  # same threshold as Puppeteer's networkidle2
+
+
+def sample_jitter(spec):
+    dist = spec.get("distribution", "uniform")
+    if dist == "uniform":
+        value = random.uniform(spec["low"], spec["high"])
+    elif dist == "triangular":
+        value = random.triangular(spec["low"], spec["high"], spec.get("mode"))
+    elif dist == "lognormal":
+        value = random.lognormvariate(spec["mu"], spec["sigma"])
+    elif dist == "gauss":
+        value = random.gauss(spec["mu"], spec["sigma"])
+    elif dist == "none":
+        value = 0.0
+    else:
+        raise ValueError(f"Unknown jitter distribution: {dist}")
+    return min(max(value, spec.get("min", 0.0)), spec.get("max", float("inf")))
+
+
+def domain_of(url):
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+# ----- Readiness signals -----
+
+def wait_for_dom(driver, timeout=READY_TIMEOUT):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") in ("interactive", "complete"))
+        return True
+    except TimeoutException:
+        logging.warning("[READY] Timed out waiting for DOMContentLoaded")
+        return False
+
+
+# Other modules (e.g. request blocking) see the same events: the log can only be read once
+_network_observers = weakref.WeakKeyDictionary()
+
+
+def register_network_observer(driver, callback):
+    observers = _network_observers.setdefault(driver, [])
+    if callback not in observers:
+        observers.append(callback)
+
+
+def drain_network_events(driver, inflight):
+    # Chrome's performance log carries the raw CDP Network.* events
+    observers = _network_observers.get(driver, ())
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method", "")
+        params = message.get("params", {})
+        for callback in observers:
+            callback(method, params)
+        if method == "Network.requestWillBeSent":
+            inflight.add(params.get("requestId"))
+        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+            inflight.discard(params.get("requestId"))
+
+
+def reset_network_log(driver):
+    # Call before driver.get so requests left over from the previous page don't count
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        drain_network_events(driver, set())
+    except WebDriverException:
+        pass
+
+
+def wait_for_network_idle(driver, timeout=READY_TIMEOUT, idle_ms=NETWORK_IDLE_MS,
+                          max_inflight=NETWORK_IDLE_INFLIGHT):
+    from selenium.common.exceptions import WebDriverException
+
+    deadline = time.monotonic() + timeout
+    inflight = set()
+    quiet_since = None
+    use_cdp = True
+    last_count = -1
+    while time.monotonic() < deadline:
+        if use_cdp:
+            try:
+                drain_network_events(driver, inflight)
+                busy = len(inflight) > max_inflight
+            except WebDriverException:
+                use_cdp = False  # no performance log (e.g. Firefox): fall back to Resource Timing
+                continue
+        else:
+            count = driver.execute_script("return performance.getEntriesByType('resource').length")
+            busy = count != last_count
+            last_count = count
+
+        now = time.monotonic()
+        if busy:
+            quiet_since = None
+        elif quiet_since is None:
+            quiet_since = now
+        elif (now - quiet_since) * 1000 >= idle_ms:
+            return True
+        time.sleep(0.1)
+    logging.warning(f"[READY] Network still busy after {timeout}s ({len(inflight)} in flight)")
+    return False
+
+
+SETTLE_JS = """
+    const done = arguments[arguments.length - 1];
+    const timeoutMs = arguments[0];
+    const inViewOnly = arguments[1];
+    const imgs = Array.from(document.images).filter(img => {
+        if (img.complete) return false;
+        if (!inViewOnly) return true;
+        const r = img.getBoundingClientRect();
+        return r.bottom >= 0 && r.top <= window.innerHeight;
+    });
+    const loads = imgs.map(img => new Promise(res => {
+        img.addEventListener('load', res, {once: true});
+        img.addEventListener('error', res, {once: true});
+    }));
+    const fonts = document.fonts ? document.fonts.ready : Promise.resolve();
+    const timer = new Promise(res => setTimeout(() => res('timeout'), timeoutMs));
+    Promise.race([Promise.all([fonts, ...loads]).then(() => 'settled'), timer]).then(done);
+"""
+
+
+def wait_for_assets(driver, timeout=READY_TIMEOUT, in_view_only=False):
+    from selenium.common.exceptions import WebDriverException
+
+    driver.set_script_timeout(timeout + 5)
+    try:
+        state = driver.execute_async_script(SETTLE_JS, int(timeout * 1000), in_view_only)
+    except WebDriverException as e:
+        logging.warning(f"[READY] Could not wait for fonts/images: {e}")
+        return False
+    return state == "settled"
+
+
+def wait_for_ready(driver, timeout=READY_TIMEOUT):
+    started = time.monotonic()
+    wait_for_dom(driver, timeout)
+    wait_for_network_idle(driver, max(1, timeout - (time.monotonic() - started)))
+    wait_for_assets(driver, max(1, timeout - (time.monotonic() - started)))
+    logging.info(f"[READY] Page settled in {time.monotonic() - started:.1f}s")
+
+
+# ----- Politeness -----
+
+class DomainRateLimiter:
+    # Token bucket per domain. try_acquire never blocks, so a worker can move on
+    # to another domain's URL while this one is throttled.
+    def __init__(self, rate_per_minute=6, burst=1, jitter=ARTICLE_JITTER):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.buckets = {}  # domain -> [tokens, last_refill, not_before]
+
+    def try_acquire(self, domain):
+        # Returns 0 and takes a token, or the number of seconds until one is available
+        with self.lock:
+            now = time.monotonic()
+            tokens, last, not_before = self.buckets.get(domain, (self.burst, now, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            wait = max(not_before - now, (1 - tokens) / self.rate if tokens < 1 else 0.0)
+            if wait > 0:
+                self.buckets[domain] = [tokens, now, not_before]
+                return wait
+            # The jitter goes on top of the refill wait; taking the larger of the two would let the
+            # refill win at low rates and space requests at a fixed interval again
+            tokens -= 1
+            refill = (1 - tokens) / self.rate if tokens < 1 else 0.0
+            self.buckets[domain] = [tokens, now, now + max(refill, 0.0) + sample_jitter(self.jitter)]
+            return 0.0
+
+    def acquire(self, domain):
+        while True:
+            wait = self.try_acquire(domain)
+            if wait <= 0:
+                return
+            logging.info(f"[WAIT] {domain} throttled for {wait:.1f}s")
+            time.sleep(wait)
@@ -0,0 +1,108 @@
+import os
+import base64
+import logging
+import tempfile
+
+# Page geometry for the reMarkable Paper Pro, in inches
+PDF_PRINT_OPTIONS = {
+    "printBackground": True,
+    "paperWidth": 5.8,
+    "paperHeight": 8.3,
+    "marginTop": 0.4,
+    "marginBottom": 0.4,
+    "marginLeft": 0.4,
+    "marginRight": 0.4,
+    "scale": 0.9,
+}
+
+# Size of each IO.read request. Keeps only one chunk (plus its base64 form) in memory.
+STREAM_CHUNK_SIZE = 1024 * 1024
+# Slice of a base64 PDF decoded at a time (a multiple of 4 characters, ~1 MiB decoded)
+BASE64_CHUNK_CHARS = STREAM_CHUNK_SIZE // 3 * 4
+CM_PER_INCH = 2.54
+
+
+def write_atomically(output_path, chunks):
+    # Write to a temp file next to the target, then rename into place so a crash
+    # never leaves a half-written PDF under the final name.
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".scribe-", suffix=".part", dir=out_dir)
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+def iter_cdp_stream(send, handle, chunk_size=STREAM_CHUNK_SIZE):
+    # send(method, params) issues one CDP command: driver.execute_cdp_cmd or a Tab session
+    try:
+        while True:
+            resp = send("IO.read", {"handle": handle, "size": chunk_size})
+            data = resp.get("data", "")
+            if data:
+                yield base64.b64decode(data) if resp.get("base64Encoded") else data.encode("utf-8")
+            if resp.get("eof"):
+                break
+    finally:
+        send("IO.close", {"handle": handle})
+
+
+def stream_pdf(send, output_path, print_options=None):
+    params = dict(print_options or PDF_PRINT_OPTIONS)
+    params["transferMode"] = "ReturnAsStream"
+    result = send("Page.printToPDF", params)
+
+    handle = result.get("stream")
+    if handle is None:
+        # Older Chrome builds ignore transferMode and inline the document
+        return write_atomically(output_path, [base64.b64decode(result["data"])])
+
+    size = write_atomically(output_path, iter_cdp_stream(send, handle))
+    logging.info(f"[PDF] Streamed {size / 1024:.0f} KiB to {output_path}")
+    return size
+
+
+def stream_pdf_to_file(driver, output_path, print_options=None):
+    return stream_pdf(driver.execute_cdp_cmd, output_path, print_options)
+
+
+def webdriver_print_options(print_options=None):
+    # The same geometry for the W3C WebDriver Print command (Firefox), which works in centimetres
+    from selenium.webdriver.common.print_page_options import PrintOptions
+
+    options = print_options or PDF_PRINT_OPTIONS
+    result = PrintOptions()
+    result.page_width = options["paperWidth"] * CM_PER_INCH
+    result.page_height = options["paperHeight"] * CM_PER_INCH
+    result.margin_top = options["marginTop"] * CM_PER_INCH
+    result.margin_bottom = options["marginBottom"] * CM_PER_INCH
+    result.margin_left = options["marginLeft"] * CM_PER_INCH
+    result.margin_right = options["marginRight"] * CM_PER_INCH
+    result.scale = options.get("scale", 1.0)
+    result.background = options.get("printBackground", False)
+    result.shrink_to_fit = False  # printToPDF lays out at the given scale without shrinking wide pages
+    return result
+
+
+def iter_base64(data, chunk_chars=BASE64_CHUNK_CHARS):
+    for start in range(0, len(data), chunk_chars):
+        yield base64.b64decode(data[start:start + chunk_chars])
+
+
+def print_page_to_file(driver, output_path, print_options=None):
+    # WebDriver Print hands back the whole PDF as one base64 string. It is decoded slice by slice
+    # straight into the file, so the decoded document is never held in memory as well.
+    data = driver.print_page(webdriver_print_options(print_options))
+    size = write_atomically(output_path, iter_base64(data))
+    logging.info(f"[PDF] Wrote {size / 1024:.0f} KiB to {output_path}")
+    return size
@@ -0,0 +1,158 @@
+import io
+import os
+import sys
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# ----- Configuration -----
+PAPER_PRO_PPI = 229  # reMarkable Paper Pro: 1620 x 2160 px on an 11.8" panel
+JPEG_QUALITY  = 70
+OVERSAMPLE    = 1.1  # leave images alone unless they are this much bigger than the screen can show
+
+
+def downsample_images(doc, ppi, grayscale, quality):
+    from PIL import Image
+
+    done = set()
+    for page in doc:
+        for info in page.get_images(full=True):
+            xref, smask, width, height = info[0], info[1], info[2], info[3]
+            if xref in done or smask:  # soft-masked images would lose their transparency
+                continue
+            done.add(xref)
+            rects = page.get_image_rects(xref)
+            if not rects:
+                continue
+            shown_w = max(r.width for r in rects) / 72 * ppi
+            shown_h = max(r.height for r in rects) / 72 * ppi
+            if width <= shown_w * OVERSAMPLE and height <= shown_h * OVERSAMPLE and not grayscale:
+                continue
+
+            original = doc.extract_image(xref)
+            try:
+                im = Image.open(io.BytesIO(original["image"]))
+                im.thumbnail((max(1, int(shown_w)), max(1, int(shown_h))), Image.LANCZOS)
+                im = im.convert("L" if grayscale else "RGB")
+                out = io.BytesIO()
+                im.save(out, "JPEG", quality=quality, optimize=True)
+            except Exception as e:  # CMYK oddities, JBIG2, etc.: keep the original
+                logging.debug(f"[OPTIMIZE] Skipping image {xref}: {e}")
+                continue
+            if out.tell() < len(original["image"]):
+                page.replace_image(xref, stream=out.getvalue())
+
+
+def optimize_pdf(path, ppi=PAPER_PRO_PPI, grayscale=False, quality=JPEG_QUALITY):
+    # Runs in a worker process. Returns (path, bytes_before, bytes_after).
+    import fitz
+
+    before = os.path.getsize(path)
+    tmp_path = None
+    doc = fitz.open(path)
+    try:
+        try:
+            downsample_images(doc, ppi, grayscale, quality)
+            try:
+                doc.subset_fonts()  # needs fontTools; the PDF is still valid without it
+            except Exception as e:
+                logging.debug(f"[OPTIMIZE] Font subsetting skipped: {e}")
+            out_dir = os.path.dirname(os.path.abspath(path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".scribe-", suffix=".part", dir=out_dir)
+            os.close(fd)
+            # garbage=4 also merges duplicate objects, which dedupes fonts embedded more than once
+            doc.save(tmp_path, garbage=4, deflate=True, deflate_images=True, deflate_fonts=True, clean=True)
+        finally:
+            doc.close()
+
+        after = os.path.getsize(tmp_path)
+        if after < before:
+            os.replace(tmp_path, path)
+        else:
+            os.remove(tmp_path)
+            after = before
+    except BaseException:
+        # Same as write_atomically: never leave a .part file next to the output
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        raise
+    return path, before, after
+
+
+def describe(before, after):
+    saved = before - after
+    share = saved / before * 100 if before else 0
+    return f"{before / 2**20:.2f} MiB -> {after / 2**20:.2f} MiB (saved {saved / 2**20:.2f} MiB, {share:.0f}%)"
+
+
+class PostProcessor:
+    # Optimizes finished PDFs in a process pool so the browser never waits on it
+    def __init__(self, workers=None, ppi=PAPER_PRO_PPI, grayscale=False, quality=JPEG_QUALITY, on_done=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.options = (ppi, grayscale, quality)
+        self.on_done = on_done  # called as on_done(path, before, after)
+        self.lock = threading.Lock()
+        self.files = 0
+        self.before = 0
+        self.after = 0
+
+    def submit(self, path):
+        future = self.pool.submit(optimize_pdf, path, *self.options)
+        future.add_done_callback(self.finished)
+        return future
+
+    def finished(self, future):
+        try:
+            path, before, after = future.result()
+        except Exception as e:
+            logging.error(f"[OPTIMIZE] Failed: {e}")
+            return
+        with self.lock:
+            self.files += 1
+            self.before += before
+            self.after += after
+        logging.info(f"[OPTIMIZE] {os.path.basename(path)}: {describe(before, after)}")
+        if self.on_done:
+            self.on_done(path, before, after)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        if self.files:
+            logging.info(f"[OPTIMIZE] Batch of {self.files} file(s): {describe(self.before, self.after)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shrink PDFs for the reMarkable Paper Pro.")
+    parser.add_argument("paths", nargs="+", help="PDF files or directories of PDFs")
+    parser.add_argument("--ppi", type=int, default=PAPER_PRO_PPI)
+    parser.add_argument("--grayscale", action="store_true")
+    parser.add_argument("--quality", type=int, default=JPEG_QUALITY)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, n) for n in sorted(os.listdir(path)) if n.lower().endswith(".pdf")]
+        else:
+            files.append(path)
+    if not files:
+        print("No PDFs found.")
+        sys.exit(1)
+
+    processor = PostProcessor(args.workers, args.ppi, args.grayscale, args.quality)
+    for path in files:
+        processor.submit(path)
+    processor.close()
+
+
+if __name__ == "__main__":
+    main()
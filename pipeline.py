@@ -0,0 +1,160 @@
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+from metrics import emit
+
+# ----- Configuration -----
+QUEUE_DEPTH  = 4    # items waiting in front of each stage; a full queue blocks the stage before it
+REPORT_EVERY = 60   # seconds between utilization lines in the log
+SAMPLE_EVERY = 1.0  # seconds between queue depth samples
+
+_DONE = object()  # end-of-input marker, one per stage worker
+
+
+class Stage:
+    # One step of the pipeline: a bounded inbox and the workers that drain it. Workers are threads;
+    # a stage whose work belongs in a process pool has its threads hand items to that pool.
+    def __init__(self, name, workers, inbox=None, fn=None):
+        self.name = name
+        self.workers = workers
+        self.inbox = inbox
+        self.fn = fn
+        self.lock = threading.Lock()
+        self.busy = 0.0
+        self.active = 0
+        self.processed = 0
+        self.errors = 0
+        self.depth_sum = 0
+        self.depth_max = 0
+        self.samples = 0
+        self.threads = []
+
+    @contextmanager
+    def working(self):
+        # Wraps one item's worth of work so busy time counts toward utilization
+        started = time.perf_counter()
+        with self.lock:
+            self.active += 1
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.busy += time.perf_counter() - started
+                self.processed += 1
+                self.errors += failed
+
+    def sample(self):
+        depth = self.inbox.qsize() if self.inbox is not None else 0
+        with self.lock:
+            self.depth_sum += depth
+            self.depth_max = max(self.depth_max, depth)
+            self.samples += 1
+        return depth
+
+    def snapshot(self, elapsed):
+        with self.lock:
+            return {"stage": self.name, "workers": self.workers, "processed": self.processed,
+                    "errors": self.errors, "active": self.active,
+                    "utilization": round(self.busy / (self.workers * elapsed), 3) if elapsed else 0.0,
+                    "queue": self.inbox.qsize() if self.inbox is not None else 0,
+                    "queue_max": self.depth_max,
+                    "queue_avg": round(self.depth_sum / self.samples, 2) if self.samples else 0.0}
+
+
+class Pipeline:
+    # Stages connected by bounded queues. Each stage function takes an item and returns the item
+    # for the next stage (or None to drop it). done(item) is called once for every item that leaves
+    # the pipeline, whether it reached the end, was dropped or failed.
+    def __init__(self, done=None, report_every=REPORT_EVERY):
+        self.done = done
+        self.report_every = report_every
+        self.stages = []      # processing stages, in order
+        self.external = []    # stages whose workers live elsewhere (the browsers), reported alongside
+        self.started = None
+        self.stopping = threading.Event()
+        self.reporter = None
+
+    def track(self, name, workers, inbox=None):
+        # Registers a stage that runs outside the pipeline, e.g. the browser workers feeding put()
+        stage = Stage(name, workers, inbox)
+        self.external.append(stage)
+        return stage
+
+    def stage(self, name, fn, workers=1, depth=QUEUE_DEPTH):
+        stage = Stage(name, workers, queue.Queue(maxsize=depth), fn)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        self.started = time.perf_counter()
+        for index, stage in enumerate(self.stages):
+            for i in range(stage.workers):
+                t = threading.Thread(target=self.run_stage, args=(index, stage), name=f"scribe-{stage.name}-{i}",
+                                     daemon=True)
+                t.start()
+                stage.threads.append(t)
+        self.reporter = threading.Thread(target=self.report_loop, name="scribe-pipeline-report", daemon=True)
+        self.reporter.start()
+        return self
+
+    def put(self, item):
+        # Blocks while the first stage is full, which is the backpressure on whoever produces items
+        self.stages[0].inbox.put(item)
+
+    def run_stage(self, index, stage):
+        following = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = stage.inbox.get()
+            if item is _DONE:
+                return
+            result = None
+            try:
+                with stage.working():
+                    result = stage.fn(item)
+            except Exception as e:
+                logging.error(f"[PIPELINE] {stage.name} failed: {e}")
+            if result is not None and following is not None:
+                following.inbox.put(result)
+            elif self.done:
+                try:
+                    self.done(result if result is not None else item)
+                except Exception as e:
+                    logging.error(f"[PIPELINE] done callback failed: {e}")
+
+    def report_loop(self):
+        last = time.monotonic()
+        while not self.stopping.wait(SAMPLE_EVERY):
+            for stage in self.external + self.stages:
+                stage.sample()
+            if time.monotonic() - last >= self.report_every:
+                last = time.monotonic()
+                self.report()
+
+    def report(self, final=False):
+        elapsed = time.perf_counter() - self.started
+        snapshots = [stage.snapshot(elapsed) for stage in self.external + self.stages]
+        line = " | ".join(f"{s['stage']} x{s['workers']} {s['utilization']:.0%} busy, q {s['queue']}"
+                          f" (avg {s['queue_avg']:.1f}, max {s['queue_max']})" for s in snapshots)
+        logging.info(f"[PIPELINE] {'Run total: ' if final else ''}{line}")
+        emit({"type": "pipeline", "ts": round(time.time(), 3), "elapsed_s": round(elapsed, 1),
+              "final": final, "stages": snapshots})
+        return snapshots
+
+    def close(self):
+        # Drains stage by stage: each stage sees its end markers only after everything before it
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.inbox.put(_DONE)
+            for t in stage.threads:
+                t.join()
+        self.stopping.set()
+        if self.started is not None:
+            return self.report(final=True)
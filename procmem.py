@@ -0,0 +1,118 @@
+import os
+import sys
+
+try:
+    import psutil  # in requirements.txt; /proc is used on Linux when it is missing
+except ImportError:
+    psutil = None
+
+
+def rss_available():
+    # Without psutil, memory can only be read from /proc
+    return psutil is not None or sys.platform.startswith("linux")
+
+
+def _proc_children():
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _proc_rss(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree_rss(pid):
+    # Resident memory of a process and all its descendants, in bytes (None if unknown)
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    if not sys.platform.startswith("linux"):
+        return None
+    children = _proc_children()
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += _proc_rss(current)
+        stack.extend(children.get(current, ()))
+    return total
+
+
+def driver_rss(driver):
+    # chromedriver/geckodriver is the parent of every browser process it launched
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+    return process_tree_rss(pid)
+
+
+def kill_process_tree(pid):
+    # Last resort for a browser whose driver no longer answers quit(): kills the driver and its children
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = root.children(recursive=True) + [root]
+        except psutil.Error:
+            return
+        for proc in procs:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        return
+
+    if sys.platform == "win32":
+        import subprocess
+        subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], capture_output=True)
+        return
+    if not sys.platform.startswith("linux"):
+        return
+    import signal
+    children = _proc_children()
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, ()))
+    for current in reversed(pids):
+        try:
+            os.kill(current, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def peak_rss_self():
+    # Peak RSS of this Python process in bytes
+    try:
+        import resource
+    except ImportError:
+        return process_tree_rss(os.getpid())
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,23 @@
+import os
+import shutil
+import logging
+import tempfile
+
+# Caches and lock files are not worth copying and Chrome recreates them on start
+PROFILE_CACHE_DIRS = ("Cache", "Code Cache", "GPUCache", "ShaderCache", "GrShaderCache",
+                      "Service Worker", "Crashpad", "Singleton*", "lockfile")
+
+
+def clone_profile(worker_id, user_data_dir, profile_name):
+    # Chrome refuses to share a user-data-dir between processes, so every extra
+    # worker gets its own copy of the logged-in profile (minus the caches).
+    dest = os.path.join(tempfile.gettempdir(), "scribe_profiles", f"worker_{worker_id}")
+    shutil.rmtree(dest, ignore_errors=True)
+    os.makedirs(dest)
+    local_state = os.path.join(user_data_dir, "Local State")
+    if os.path.exists(local_state):
+        shutil.copy2(local_state, dest)  # holds the cookie encryption key
+    shutil.copytree(os.path.join(user_data_dir, profile_name), os.path.join(dest, profile_name),
+                    ignore=shutil.ignore_patterns(*PROFILE_CACHE_DIRS))
+    logging.info(f"[POOL] Cloned profile for worker {worker_id} -> {dest}")
+    return dest
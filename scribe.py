@@ -0,0 +1,65 @@
+from startup import StartupProfile
+import os
+import time
+import logging
+import argparse
+
+import main_old as chrome
+from ledger import open_ledger
+
+
+def render_fast(url):
+    import fast_engine
+
+    article = fast_engine.fetch_article(url)
+    if article is None:
+        return None, None
+    timestamp = time.strftime("%Y-%m-%d_%H-%M")
+    filename = chrome.sanitize_filename(f"{timestamp}_{article['title']}") + ".pdf"
+    filepath = chrome.unique_path(os.path.join(chrome.OUTPUT_DIR, filename))
+    fast_engine.render_pdf(article, filepath)
+    return article["title"], filepath
+
+
+def main():
+    # One-off renders: python scribe.py URL [URL ...]
+    parser = argparse.ArgumentParser(description="Save one or more web pages as reMarkable PDFs.")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--engine", choices=("chrome", "fast"), default="chrome",
+                        help="'fast' skips the browser for static pages and falls back to Chrome")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print how long each cold-start phase took")
+    args = parser.parse_args()
+
+    profile = StartupProfile(args.startup_profile)
+    profile.mark("imports + config")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    os.makedirs(chrome.OUTPUT_DIR, exist_ok=True)
+    ledger = open_ledger()
+    profile.mark("ledger")
+
+    driver = None
+    blocker = chrome.create_blocker()
+    try:
+        for url in args.urls:
+            started = time.monotonic()
+            title, filepath = render_fast(url) if args.engine == "fast" else (None, None)
+            if filepath is None:
+                if driver is None:
+                    driver = chrome.create_driver()
+                    profile.mark("driver launch")
+                title, filepath = chrome.process_url(driver, url, blocker=blocker)
+            ledger.record(url, title=title, output_path=filepath,
+                          render_ms=int((time.monotonic() - started) * 1000))
+            print(f"[DONE] {filepath}")
+            profile.mark("first page" if url == args.urls[0] else "page")
+    finally:
+        if driver is not None:
+            driver.quit()
+        ledger.close()
+    profile.report()
+
+
+if __name__ == "__main__":
+    main()
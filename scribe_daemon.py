@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import argparse
+import functools
+import threading
+import socketserver
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import main_old as scribe
+from ledger import open_ledger
+from profiles import clone_profile
+from supervisor import DriverSupervisor
+
+# ----- Configuration -----
+HOST     = "127.0.0.1"
+PORT     = 8765
+WORKERS  = 1
+MAX_JOBS = 500  # finished jobs kept for status/PDF lookups
+TERMINAL_STATES = ("done", "error")
+
+
+class Job:
+    def __init__(self, url):
+        self.id = uuid.uuid4().hex[:12]
+        self.url = url
+        self.state = "queued"
+        self.path = None
+        self.error = None
+        self.created = time.time()
+        self.events = []
+        self.cond = threading.Condition()
+        self.emit("queued")
+
+    def emit(self, message, state=None):
+        with self.cond:
+            if state:
+                self.state = state
+            self.events.append({"t": round(time.time() - self.created, 3), "state": self.state,
+                                "message": message})
+            self.cond.notify_all()
+
+    def wait(self, seen, timeout=30):
+        # Blocks until there are events past `seen` (or the job is finished)
+        with self.cond:
+            self.cond.wait_for(lambda: len(self.events) > seen or self.state in TERMINAL_STATES, timeout)
+            return list(self.events[seen:]), self.state
+
+    def as_dict(self):
+        return {"id": self.id, "url": self.url, "state": self.state, "path": self.path, "error": self.error}
+
+
+class Scribe:
+    # Keeps a pool of warm Chrome drivers alive and feeds them jobs from one queue. Each driver runs
+    # under a DriverSupervisor, which recycles it as it ages and replaces it when it dies.
+    def __init__(self, workers=WORKERS):
+        self.jobs = OrderedDict()
+        self.jobs_lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.ledger = open_ledger()
+        self.threads = []
+        os.makedirs(scribe.OUTPUT_DIR, exist_ok=True)
+        for i in range(workers):
+            user_data_dir = scribe.USER_DATA_DIR if i == 0 else clone_profile(i, scribe.USER_DATA_DIR,
+                                                                                 scribe.PROFILE_NAME)
+            supervisor = DriverSupervisor(functools.partial(self.warm_driver, user_data_dir), f"daemon-{i}")
+            t = threading.Thread(target=self.worker, args=(i, supervisor), name=f"scribe-daemon-{i}",
+                                 daemon=True)
+            t.start()
+            self.threads.append(t)
+        logging.info(f"[DAEMON] {workers} warm browser(s) ready")
+
+    @staticmethod
+    def warm_driver(user_data_dir):
+        driver = scribe.create_driver(user_data_dir)
+        driver.get("about:blank")
+        return driver
+
+    def submit(self, url):
+        job = Job(url)
+        with self.jobs_lock:
+            self.jobs[job.id] = job
+            while len(self.jobs) > MAX_JOBS:
+                oldest = next(iter(self.jobs.values()))
+                if oldest.state not in TERMINAL_STATES:
+                    break
+                self.jobs.popitem(last=False)
+        self.queue.put(job)
+        logging.info(f"[DAEMON] Job {job.id} queued: {url}")
+        return job
+
+    def get(self, job_id):
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def worker(self, worker_id, supervisor):
+        blocker = scribe.create_blocker()
+        try:
+            while True:
+                job = self.queue.get()
+                if job is None:
+                    break
+                job.emit(f"picked up by worker {worker_id}", state="running")
+                started = time.monotonic()
+                restarts = supervisor.restarts
+                try:
+                    title, job.path = scribe.process_url(supervisor.driver, job.url, report=job.emit,
+                                                         blocker=blocker, tag=job.id)
+                    render_ms = int((time.monotonic() - started) * 1000)
+                    self.ledger.record(job.url, title=title, output_path=job.path, render_ms=render_ms)
+                    job.emit(f"saved {job.path}", state="done")
+                except Exception as e:
+                    if supervisor.recover(job.url, e):  # restarts a dead browser
+                        job.emit(f"browser died ({type(e).__name__}), retrying with a fresh one")
+                        self.queue.put(job)
+                        continue
+                    job.error = str(e)
+                    job.emit(f"failed: {e}", state="error")
+                    logging.error(f"[ERROR] Job {job.id} failed: {e}")
+                finally:
+                    if supervisor.restarts == restarts and not supervisor.after_page():
+                        try:
+                            supervisor.driver.get("about:blank")  # drop the article, keep the browser warm
+                        except Exception:
+                            pass
+        finally:
+            supervisor.quit()
+
+    def shutdown(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for t in self.threads:
+            t.join(timeout=30)
+        self.ledger.close()
+
+
+class ScribeHandler(BaseHTTPRequestHandler):
+    # POST /jobs {"url": ...}         -> 202 {"id": ...}; add ?wait=1 to get the PDF back directly
+    # GET  /jobs/<id>                 -> job status
+    # GET  /jobs/<id>/pdf             -> the finished PDF
+    # GET  /jobs/<id>/events          -> Server-Sent Events stream of progress
+    scribe = None
+
+    def log_message(self, fmt, *args):
+        logging.info(f"[HTTP] {fmt % args}")
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_pdf(self, job):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(os.path.getsize(job.path)))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(job.path)}"')
+        self.end_headers()
+        with open(job.path, "rb") as f:
+            while chunk := f.read(64 * 1024):
+                self.wfile.write(chunk)
+
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        if path.rstrip("/") != "/jobs":
+            return self.send_json(404, {"error": "not found"})
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            url = json.loads(self.rfile.read(length) or b"{}").get("url", "").strip()
+        except ValueError:
+            return self.send_json(400, {"error": "body must be JSON"})
+        if not url.startswith(("http://", "https://")):
+            return self.send_json(400, {"error": "missing or invalid url"})
+
+        job = self.scribe.submit(url)
+        if "wait=1" not in query:
+            return self.send_json(202, job.as_dict())
+
+        seen = 0
+        while job.state not in TERMINAL_STATES:
+            events, _ = job.wait(seen)
+            seen += len(events)
+        if job.state == "done":
+            return self.send_pdf(job)
+        return self.send_json(500, job.as_dict())
+
+    def do_GET(self):
+        parts = [p for p in self.path.split("?")[0].split("/") if p]
+        if parts == ["health"]:
+            return self.send_json(200, {"ok": True, "queued": self.scribe.queue.qsize()})
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self.send_json(404, {"error": "not found"})
+        job = self.scribe.get(parts[1])
+        if job is None:
+            return self.send_json(404, {"error": "unknown job"})
+
+        if len(parts) == 2:
+            return self.send_json(200, job.as_dict())
+        if parts[2] == "pdf":
+            if job.state != "done":
+                return self.send_json(409, job.as_dict())
+            return self.send_pdf(job)
+        if parts[2] == "events":
+            return self.stream_events(job)
+        return self.send_json(404, {"error": "not found"})
+
+    def stream_events(self, job):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        seen = 0
+        while True:
+            events, state = job.wait(seen)
+            for event in events:
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+            seen += len(events)
+            if state in TERMINAL_STATES and seen == len(job.events):
+                break
+
+
+if hasattr(socketserver, "UnixStreamServer"):  # not available on Windows
+    class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def get_request(self):
+            request, _ = super().get_request()
+            return request, ("unix", 0)  # BaseHTTPRequestHandler expects a (host, port) pair
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep warm browsers alive and render URLs on request.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="number of warm browsers")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    ScribeHandler.scribe = Scribe(max(1, args.workers))
+    if args.unix:
+        if "UnixHTTPServer" not in globals():
+            parser.error("Unix sockets are not supported on this platform")
+        if os.path.exists(args.unix):
+            os.remove(args.unix)
+        server = UnixHTTPServer(args.unix, ScribeHandler)
+        logging.info(f"[DAEMON] Listening on unix:{args.unix}")
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), ScribeHandler)
+        logging.info(f"[DAEMON] Listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        ScribeHandler.scribe.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import logging
+import importlib
+import threading
+
+from pacing import domain_of
+
+# domain -> module under site_profiles/ that defines PROFILE. Modules are imported on
+# first use, so adding sites costs nothing for runs that never visit them.
+REGISTRY = {
+    "theatlantic.com": "atlantic",
+}
+GENERIC = "generic"
+
+# Makes lazy-loaded images start fetching without scrolling the page
+EAGER_IMAGES_JS = """
+    let n = 0;
+    document.querySelectorAll('img[loading="lazy"], img[data-src]').forEach(img => {
+        img.loading = 'eager';
+        if (!img.getAttribute('src') && img.dataset.src) img.src = img.dataset.src;
+        n++;
+    });
+    return n;
+"""
+
+
+class SiteProfile:
+    # Everything site-specific the pipeline needs. Unset fields fall back to generic behaviour.
+    def __init__(self, name, listing_url=None, listing_selector=None, next_page_selector=None,
+                 ready_selector=None, metadata=None, content_root=None, cleanup_mode=None, remove=(),
+                 scroll=True, output_format=None):
+        self.name = name
+        self.listing_url = listing_url            # page the crawler reads article links from
+        self.listing_selector = listing_selector  # CSS selector of article links on that page
+        self.next_page_selector = next_page_selector  # "older" link; None means an endless scrolling river
+        self.ready_selector = ready_selector      # present once the article body has rendered
+        self.metadata = metadata or {}            # {field: (selector, attribute or None for text)}
+        self.content_root = content_root          # element holding the article, for aggressive cleanup
+        self.cleanup_mode = cleanup_mode          # None uses the caller's configured mode
+        self.remove = tuple(remove)               # extra selectors cleanup always removes on this site
+        self.scroll = scroll                      # False: lazy images are made eager instead of scrolled into view
+        self.output_format = output_format        # "pdf" or "epub"; None uses the run's --format
+
+    def content_roots(self):
+        return [self.content_root] if self.content_root else None
+
+    def __repr__(self):
+        return f"SiteProfile({self.name!r})"
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def get_profile(name):
+    with _lock:
+        profile = _loaded.get(name)
+        if profile is None:
+            profile = _loaded[name] = importlib.import_module(f"{__name__}.{name}").PROFILE
+            logging.debug(f"[SITE] Loaded profile {name}")
+        return profile
+
+
+def profile_for(url):
+    # Exact host first, then parent domains (www.foo.example.com -> foo.example.com -> example.com)
+    host = domain_of(url)
+    while host:
+        name = REGISTRY.get(host)
+        if name:
+            return get_profile(name)
+        _, _, host = host.partition(".")
+    return get_profile(GENERIC)
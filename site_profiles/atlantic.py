@@ -0,0 +1,18 @@
+from site_profiles import SiteProfile
+
+BASE_URL = "https://www.theatlantic.com"
+
+PROFILE = SiteProfile(
+    name="atlantic",
+    listing_url=f"{BASE_URL}/latest/",
+    listing_selector="a.LandingRiver_titleLink__nUImQ[href^='https://']",
+    ready_selector='[data-flatplan-title="true"]',
+    metadata={
+        "section": ('[data-flatplan-rubric="true"]', None),
+        "title":   ('[data-flatplan-title="true"]', None),
+        "author":  ('[data-flatplan-author-link="true"]', None),
+        "iso":     ('time[data-flatplan-timestamp="true"]', "datetime"),
+    },
+    content_root="article",
+    scroll=False,  # article images only lazy-load; no need to scroll the whole page
+)
@@ -0,0 +1,14 @@
+from site_profiles import SiteProfile
+
+# Any site without its own profile: OpenGraph / article:* tags that most publishers carry,
+# a full human-like scroll for lazy content, and the heuristic content root in cleanup.
+PROFILE = SiteProfile(
+    name="generic",
+    metadata={
+        "section": ('meta[property="article:section"]', "content"),
+        "title":   ('meta[property="og:title"]', "content"),
+        "author":  ('meta[name="author"]', "content"),
+        "iso":     ('meta[property="article:published_time"]', "content"),
+    },
+    scroll=True,
+)
@@ -0,0 +1,231 @@
+import os
+import sys
+import gzip
+import json
+import time
+import queue
+import shutil
+import pathlib
+import sqlite3
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+
+from ledger import LEDGER_FILE, canonicalize_url
+from pdf_capture import PDF_PRINT_OPTIONS
+
+# ----- Configuration -----
+SNAPSHOT_DIR    = "snapshots"
+RERENDER_TABS   = 4
+GZIP_LEVEL      = 6  # MHTML is mostly base64 and markup; higher levels cost time for little gain
+
+
+def capture_snapshot(send):
+    # The page as it is now (after cleanup) as one MHTML document: DOM, stylesheets and images
+    return send("Page.captureSnapshot", {"format": "mhtml"})["data"]
+
+
+class SnapshotArchive:
+    # Gzipped MHTML files named by their content hash, indexed by URL in the ledger database.
+    # Identical captures share one file.
+    def __init__(self, path=LEDGER_FILE, directory=SNAPSHOT_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                url_key      TEXT PRIMARY KEY,
+                url          TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                file         TEXT NOT NULL,
+                metadata     TEXT,
+                cleanup_mode TEXT,
+                size_bytes   INTEGER,
+                captured_at  REAL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS snapshots_by_hash ON snapshots (content_hash);
+        """)
+
+    def store(self, mhtml):
+        # Compresses and writes one capture; returns (content_hash, file, compressed size)
+        data = mhtml.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        name = content_hash + ".mhtml.gz"
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(prefix=".scribe-", suffix=".part", dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(data, GZIP_LEVEL))
+            os.replace(tmp_path, path)
+        return content_hash, name, os.path.getsize(path)
+
+    def record(self, url, content_hash, file, metadata, cleanup_mode, size_bytes):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                              (canonicalize_url(url), url, content_hash, file, json.dumps(metadata),
+                               cleanup_mode, size_bytes, time.time()))
+
+    def entries(self, like=None):
+        # [(url, file, metadata)] for every snapshot, optionally only URLs matching a LIKE pattern
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT url, file, metadata FROM snapshots WHERE url LIKE ? ORDER BY captured_at",
+                (like or "%",)).fetchall()
+        return [(url, os.path.join(self.directory, file), json.loads(metadata or "null"))
+                for url, file, metadata in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# ----- Re-rendering -----
+
+def output_path_for(ledger, url, metadata, out_dir):
+    # Same file name as the original render; in place unless --out is given
+    from main import build_output_path
+
+    record = ledger.get(url) or {}
+    original = record.get("output_path")
+    if original:
+        path = os.path.splitext(original)[0] + ".pdf"
+    else:
+        path = build_output_path(*metadata)
+    return os.path.join(out_dir, os.path.basename(path)) if out_dir else path
+
+
+def rerender_one(tab, snapshot_file, output_path, print_options, cleanup_mode, work_dir):
+    from cleanup import run_cleanup_in_tab
+
+    # Chrome only opens MHTML from a file with that extension
+    local = os.path.join(work_dir, f"{threading.get_ident()}.mhtml")
+    with gzip.open(snapshot_file, "rb") as src, open(local, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    try:
+        tab.navigate(pathlib.Path(local).resolve().as_uri(), until="load")
+        if cleanup_mode != "none":
+            run_cleanup_in_tab(tab, cleanup_mode, report=logging.debug)
+        return tab.print_pdf(output_path, print_options)
+    finally:
+        os.remove(local)
+
+
+def rerender(args):
+    import main
+    from cdp_tabs import Tab, connect_browser
+    from ledger import open_ledger
+
+    archive = SnapshotArchive(args.ledger, args.snapshots)
+    ledger = open_ledger(args.ledger)
+    entries = archive.entries(args.like)
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        print("No snapshots to re-render.")
+        return 1
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    print_options = dict(PDF_PRINT_OPTIONS)
+    for key, value in (("paperWidth", args.paper_width), ("paperHeight", args.paper_height),
+                       ("scale", args.scale)):
+        if value is not None:
+            print_options[key] = value
+    if args.margin is not None:
+        for side in ("marginTop", "marginBottom", "marginLeft", "marginRight"):
+            print_options[side] = args.margin
+
+    jobs = queue.Queue()
+    for entry in entries:
+        jobs.put(entry)
+    work_dir = tempfile.mkdtemp(prefix="scribe-rerender-")
+    profile_dir = tempfile.mkdtemp(prefix="scribe-rerender-profile-")
+    driver = main.create_driver(profile_dir)  # a throwaway profile: nothing here needs a login
+    conn = connect_browser(driver)
+    counts = {"done": 0, "failed": 0, "bytes": 0}
+    lock = threading.Lock()
+
+    def tab_loop(tab):
+        # No publisher is contacted: the tab is offline and everything comes out of the archive
+        tab.send("Network.enable")
+        tab.send("Network.emulateNetworkConditions", {"offline": True, "latency": 0,
+                                                      "downloadThroughput": -1, "uploadThroughput": -1})
+        while True:
+            try:
+                url, snapshot_file, metadata = jobs.get_nowait()
+            except queue.Empty:
+                break
+            output_path = output_path_for(ledger, url, metadata, args.out)
+            try:
+                size = rerender_one(tab, snapshot_file, output_path, print_options, args.cleanup, work_dir)
+                if (ledger.get(url) or {}).get("output_path") == output_path:
+                    ledger.update_size(url, size)  # replaced in place
+                with lock:
+                    counts["done"] += 1
+                    counts["bytes"] += size
+            except Exception as e:
+                logging.error(f"[RERENDER] {url}: {e}")
+                with lock:
+                    counts["failed"] += 1
+        tab.close()
+
+    started = time.monotonic()
+    try:
+        threads = [threading.Thread(target=tab_loop, args=(Tab(conn),), name=f"scribe-rerender-{i}",
+                                    daemon=True) for i in range(min(args.tabs, len(entries)))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        conn.close()
+        driver.quit()
+        shutil.rmtree(work_dir, ignore_errors=True)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        archive.close()
+        ledger.close()
+
+    elapsed = time.monotonic() - started
+    logging.info(f"[RERENDER] {counts['done']} PDF(s), {counts['bytes'] / 2**20:.1f} MiB in {elapsed:.0f}s "
+                 f"({counts['done'] / max(elapsed, 0.001) * 60:.0f}/min), {counts['failed']} failed")
+    return 1 if counts["failed"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Work with the page snapshots main.py --snapshots keeps.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    again = sub.add_parser("rerender", help="rebuild PDFs from snapshots, offline, across several tabs")
+    again.add_argument("--tabs", type=int, default=RERENDER_TABS)
+    again.add_argument("--out", help="write PDFs here instead of replacing the originals")
+    again.add_argument("--like", help="only URLs matching this SQL LIKE pattern, e.g. '%%theatlantic.com%%'")
+    again.add_argument("--limit", type=int, help="at most this many snapshots")
+    again.add_argument("--cleanup", choices=("none", "gentle", "aggressive"), default="none",
+                       help="run cleanup again on the (already cleaned) snapshot")
+    again.add_argument("--paper-width", type=float, help="inches")
+    again.add_argument("--paper-height", type=float, help="inches")
+    again.add_argument("--margin", type=float, help="inches, all four sides")
+    again.add_argument("--scale", type=float)
+    sub.add_parser("list", help="list archived snapshots")
+    for p in sub.choices.values():
+        p.add_argument("--ledger", default=LEDGER_FILE)
+        p.add_argument("--snapshots", default=SNAPSHOT_DIR, help="snapshot directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    if args.command == "list":
+        archive = SnapshotArchive(args.ledger, args.snapshots)
+        for url, path, metadata in archive.entries():
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            print(f"{size / 1024:>8.0f} KiB  {url}")
+        archive.close()
+        return
+    sys.exit(rerender(args))
+
+
+if __name__ == "__main__":
+    main()
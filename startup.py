@@ -0,0 +1,26 @@
+import time
+
+# Imported first by the entry scripts so the "imports" phase covers everything after it
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfile:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        self.last = PROCESS_START
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        total = sum(seconds for _, seconds in self.phases)
+        print("\n=== Startup profile ===")
+        for phase, seconds in self.phases:
+            share = seconds / total * 100 if total else 0
+            print(f"{phase:<22}{seconds * 1000:>10.1f} ms {share:>6.1f}%")
+        print(f"{'total':<22}{total * 1000:>10.1f} ms")
@@ -0,0 +1,185 @@
+import time
+import logging
+import threading
+
+from metrics import emit
+from procmem import driver_rss, kill_process_tree, rss_available
+
+# ----- Configuration -----
+MAX_BROWSER_RSS = 1536 * 2**20  # recycle once the driver's process tree holds this much memory
+MAX_PAGES       = 150           # ...or after this many articles, whichever comes first
+MAX_ATTEMPTS    = 2             # a URL whose render kills the browser this often is given up on
+
+# Exceptions raised when the driver process itself is unreachable. Page-level failures arrive as
+# WebDriverException or CdpError instead, so these never fire for a site that is down.
+DEAD_SESSION_ERRORS = (
+    "InvalidSessionIdException", "MaxRetryError", "NewConnectionError", "ProtocolError",
+    "RemoteDisconnected", "ConnectionRefusedError", "ConnectionResetError", "ConnectionAbortedError",
+)
+# Messages chromedriver, geckodriver and cdp_tabs use for a browser that is gone. Kept to whole
+# phrases: page errors such as net::ERR_CONNECTION_RESET must not restart the browser.
+DEAD_SESSION_MARKERS = (
+    "invalid session id", "session deleted because of page crash", "chrome not reachable",
+    "not connected to devtools", "tab crashed", "unable to receive message from renderer",
+    "target window already closed", "failed to decode response from marionette",
+    "devtools connection is closed", "devtools connection closed during",
+)
+
+_rss_warned = False
+
+
+def warn_if_rss_unavailable():
+    # Once per process: without RSS readings only the page limit recycles browsers
+    global _rss_warned
+    if not _rss_warned and not rss_available():
+        _rss_warned = True
+        logging.warning("[SUPERVISOR] Browser memory cannot be read here (pip install psutil); browsers are "
+                        f"recycled every {MAX_PAGES} pages only, not at {MAX_BROWSER_RSS / 2**30:.1f} GiB RSS")
+
+
+def is_dead_session(exc):
+    if type(exc).__name__ in DEAD_SESSION_ERRORS:
+        return True
+    text = str(exc).lower()
+    return any(marker in text for marker in DEAD_SESSION_MARKERS)
+
+
+class DriverSupervisor:
+    # Owns one driver for a worker. Callers always go through .driver, which is swapped for a
+    # fresh one when the old browser grew too large, served too many pages or died.
+    def __init__(self, factory, name="driver", driver=None, max_rss=MAX_BROWSER_RSS, max_pages=MAX_PAGES,
+                 report=logging.info):
+        self.factory = factory
+        self.name = name
+        self.max_rss = max_rss
+        self.max_pages = max_pages
+        self.report = report
+        self.lock = threading.Lock()
+        warn_if_rss_unavailable()
+        self.driver = driver if driver is not None else factory()
+        self.pages = 0
+        self.restarts = 0
+        self.attempts = {}  # url -> renders that ended with a dead session
+
+    def alive(self):
+        try:
+            self.driver.current_window_handle  # one cheap round trip through chromedriver to the page
+            return True
+        except Exception:
+            return False
+
+    def stop(self, driver):
+        try:
+            pid = driver.service.process.pid
+        except AttributeError:
+            pid = None
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.debug(f"[SUPERVISOR] {self.name}: quit failed ({e}); killing the process tree")
+            if pid:
+                kill_process_tree(pid)
+
+    def restart(self, reason):
+        with self.lock:
+            started = time.perf_counter()
+            self.stop(self.driver)
+            self.driver = self.factory()
+            pages, self.pages = self.pages, 0
+            self.restarts += 1
+            ms = (time.perf_counter() - started) * 1000
+        self.report(f"[SUPERVISOR] Restarted {self.name} after {pages} page(s) ({reason}) in {ms / 1000:.1f}s")
+        emit({"type": "restart", "ts": round(time.time(), 3), "worker": self.name, "reason": reason,
+              "pages": pages, "ms": round(ms, 1)})
+        return self.driver
+
+    def worn_out(self):
+        # Counts one article; returns why the browser should be recycled, or None
+        with self.lock:
+            self.pages += 1
+            pages = self.pages
+        if pages >= self.max_pages:
+            return f"page limit {self.max_pages}"
+        rss = driver_rss(self.driver)
+        if rss and rss > self.max_rss:
+            return f"browser RSS {rss / 2**20:.0f} MiB > {self.max_rss / 2**20:.0f} MiB"
+        return None
+
+    def after_page(self):
+        # Called once per article. Returns True when the driver was recycled.
+        reason = self.worn_out()
+        if reason:
+            self.restart(reason)
+        return reason is not None
+
+    def died(self, exc):
+        # A live browser means the page itself failed, which a restart won't fix
+        return is_dead_session(exc) or not self.alive()
+
+    def may_retry(self, url):
+        # Counts a dead session on url; False once it has killed the browser MAX_ATTEMPTS times
+        with self.lock:
+            self.attempts[url] = attempts = self.attempts.get(url, 0) + 1
+        if attempts >= MAX_ATTEMPTS:
+            logging.error(f"[SUPERVISOR] Giving up on {url}: the browser died {attempts} times on it")
+            return False
+        return True
+
+    def recover(self, url, exc):
+        # Called when rendering url raised. Restarts a dead browser and says whether url deserves
+        # another try.
+        if not self.died(exc):
+            return False
+        retry = self.may_retry(url)
+        self.restart(f"session died on {url}: {type(exc).__name__}")
+        return retry
+
+    def quit(self):
+        if self.restarts:
+            self.report(f"[SUPERVISOR] {self.name} was restarted {self.restarts} time(s)")
+        self.stop(self.driver)
+
+
+class SharedBrowser:
+    # The one browser --tabs mode renders in, under a DriverSupervisor. Tabs check in before each
+    # article and out after it. A recycle or a dead session is carried out by the last tab to check
+    # out while new check-ins wait, so no tab is replaced mid-article; tabs see the new generation
+    # on their next check-in and open fresh targets on the new DevTools connection.
+    def __init__(self, supervisor, connect, lock=None):
+        self.supervisor = supervisor
+        self.connect = connect
+        self.lock = lock or threading.Lock()  # also held by whoever else drives supervisor.driver
+        self.conn = connect(supervisor.driver)
+        self.generation = 0
+        self.cond = threading.Condition()
+        self.active = 0
+        self.pending = None  # why the browser is replaced once the tabs have drained
+
+    def enter(self):
+        # Returns the generation the caller's tab must belong to
+        with self.cond:
+            self.cond.wait_for(lambda: self.pending is None)
+            self.active += 1
+            return self.generation
+
+    def leave(self, restart=None):
+        with self.cond:
+            self.active -= 1
+            if restart and self.pending is None:
+                self.pending = restart
+            if self.pending is None or self.active:
+                return
+            try:
+                with self.lock:
+                    self.conn.close()
+                    self.supervisor.restart(self.pending)
+                    self.conn = self.connect(self.supervisor.driver)
+            finally:
+                # Even a failed restart lets the tabs go on; their errors bring the next attempt
+                self.generation += 1
+                self.pending = None
+                self.cond.notify_all()
+
+    def close(self):
+        self.conn.close()
+        self.supervisor.quit()